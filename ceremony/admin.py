@@ -1,5 +1,23 @@
 from django.contrib import admin
-from .models import Graduate, StageState
+from .models import Ceremony, Graduate, GraduateEvent, Session, StageState
+
+
+class SessionInline(admin.TabularInline):
+    model = Session
+    extra = 1
+
+
+@admin.register(Ceremony)
+class CeremonyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'date')
+    inlines = [SessionInline]
+
+
+@admin.register(Session)
+class SessionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ceremony', 'starts_at', 'archived')
+    list_filter = ('archived', 'ceremony')
+    list_select_related = ('ceremony',)
 
 
 @admin.register(Graduate)
@@ -13,10 +31,35 @@ class GraduateAdmin(admin.ModelAdmin):
         'gown_returned',
         'presentation_order',
     )
-    list_filter = ('attended', 'gown_collected', 'gown_returned', 'payment_status')
+    list_filter = ('session', 'stage_channel', 'attended', 'gown_type', 'gown_collected', 'gown_returned', 'payment_status')
     search_fields = ('name', 'student_id', 'email', 'unique_id', 'submission_id')
 
+    # Counters and running order are kept per session: pick it once, on creation
+    def get_readonly_fields(self, request, obj=None):
+        return ('session',) if obj else ()
+
 
 @admin.register(StageState)
 class StageStateAdmin(admin.ModelAdmin):
-    list_display = ('current_graduate',)
+    list_display = ('session', 'channel', 'current_graduate')
+    list_filter = ('session',)
+    list_select_related = ('session__ceremony', 'current_graduate')
+
+
+@admin.register(GraduateEvent)
+class GraduateEventAdmin(admin.ModelAdmin):
+    list_display = ('time', 'kind', 'graduate', 'source', 'channel', 'actor')
+    list_filter = ('session', 'kind', 'source')
+    list_select_related = ('graduate',)
+    search_fields = ('actor', 'graduate__name', 'graduate__student_id')
+    date_hierarchy = 'time'
+
+    # Append-only: the log is a record of what happened
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def analyze_after_migrate(sender, using, **kwargs):
+    from ceremony.utils import analyze_database
+
+    analyze_database(using)
+
 
 class CeremonyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ceremony'
+
+    def ready(self):
+        # New indexes need fresh planner statistics (see utils.analyze_database)
+        post_migrate.connect(analyze_after_migrate, sender=self)
@@ -0,0 +1,11 @@
+from ceremony.models import Session
+
+
+def ceremony_session(request):
+    """The session the user works in, and the others they can switch to (navbar picker)."""
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'current_session': Session.for_request(request),
+        'open_sessions': Session.objects.select_related('ceremony').filter(archived=False),
+    }
@@ -0,0 +1,147 @@
+"""
+Lists for finance and the registrar, streamed straight from the database so
+memory stays flat and downloads start at once, whatever the cohort size.
+Used by views.export and `manage.py export_graduates`.
+"""
+import csv
+import datetime
+import importlib.util
+from itertools import islice
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from ceremony.models import Graduate
+
+# Payment statuses (as exported by the booking form) that count as paid
+PAID_STATUSES = ('Paid', 'Completed')
+
+ATTENDANCE_COLUMNS = {
+    'unique_id': 'Unique ID',
+    'student_id': 'Student ID',
+    'name': 'Name',
+    'email': 'Email',
+    'qualification': 'Qualification',
+    'attended': 'Checked in',
+    'check_in_time': 'Check-in time',
+    'checked_in_by': 'Checked in by',
+    'seat_row': 'Seat row',
+    'seat_number': 'Seat number',
+}
+GOWN_COLUMNS = {
+    'unique_id': 'Unique ID',
+    'student_id': 'Student ID',
+    'name': 'Name',
+    'email': 'Email',
+    'gown_type': 'Gown type',
+    'gown_option': 'Gown option',
+    'gown_size': 'Gown size',
+    'gown_collected': 'Gown collected',
+    'gown_returned': 'Gown returned',
+    'gown_notes': 'Gown notes',
+}
+PAYMENT_COLUMNS = {
+    'unique_id': 'Unique ID',
+    'student_id': 'Student ID',
+    'submission_id': 'Submission ID',
+    'submission_date': 'Submission date',
+    'name': 'Name',
+    'email': 'Email',
+    'payment_status': 'Payment status',
+    'total_amount': 'Total amount',
+    'additional_guests': 'Additional guests',
+    'attended': 'Checked in',
+}
+
+
+def unpaid(queryset):
+    paid = Q()
+    for status in PAID_STATUSES:
+        paid |= Q(payment_status__iexact=status)
+    return queryset.exclude(paid)
+
+
+# ?preset= → (title, filter, columns)
+EXPORT_PRESETS = {
+    'attendance': ('Attendance', lambda qs: qs, ATTENDANCE_COLUMNS),
+    'not_checked_in': ('Not checked in', lambda qs: qs.filter(attended=False), ATTENDANCE_COLUMNS),
+    'gowns': ('Gowns', lambda qs: qs, GOWN_COLUMNS),
+    'hire_outstanding': ('Hired gown not returned', lambda qs: qs.hire_outstanding(), GOWN_COLUMNS),
+    'payments': ('Payments', lambda qs: qs, PAYMENT_COLUMNS),
+    'attended_unpaid': ('Attended but unpaid', lambda qs: unpaid(qs.filter(attended=True)), PAYMENT_COLUMNS),
+}
+
+# Rows per chunk handed to the response (and per database fetch)
+EXPORT_CHUNK_ROWS = 500
+
+XLSX_AVAILABLE = importlib.util.find_spec('openpyxl') is not None
+
+
+def export_rows(preset, session):
+    """Header, then one tuple per graduate of the session, read in chunks by unique_id."""
+    _, filter_graduates, columns = EXPORT_PRESETS[preset]
+    yield tuple(columns.values())
+    graduates = filter_graduates(Graduate.objects.filter(session=session)).order_by('unique_id')
+    yield from graduates.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_ROWS)
+
+
+def export_filename(preset, session, extension):
+    return f"{preset}-{slugify(session.name) or session.pk}-{timezone.localdate():%Y-%m-%d}.{extension}"
+
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_formula(value):
+    """Free text such as '=HYPERLINK(…)' from the booking form, kept as text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_value(value):
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    return escape_formula(value)
+
+
+class Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows):
+    """CSV text of `rows`, EXPORT_CHUNK_ROWS lines per chunk."""
+    writer = csv.writer(Echo())
+    rows = iter(rows)
+    while chunk := list(islice(rows, EXPORT_CHUNK_ROWS)):
+        yield ''.join(writer.writerow([csv_value(value) for value in row]) for row in chunk)
+
+
+def xlsx_value(value):
+    # Excel has no time zones: write local wall-clock times
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).replace(tzinfo=None)
+    # openpyxl stores any string starting with '=' as a formula
+    return escape_formula(value)
+
+
+def write_xlsx(preset, session, file):
+    """
+    The export as an .xlsx workbook (needs openpyxl). Write-only mode keeps
+    memory flat, but the file is only complete at the end, so unlike CSV it
+    can't start downloading straight away.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXPORT_PRESETS[preset][0])
+    for row in export_rows(preset, session):
+        sheet.append([xlsx_value(value) for value in row])
+    workbook.save(file)
@@ -8,14 +8,28 @@ class SearchForm(forms.Form):
         label='Search',
         widget=forms.TextInput(attrs={
             'class': 'form-control form-control-lg',
-            'placeholder': 'Scan or type Student ID, Name, Email or Unique ID',
+            'placeholder': 'Scan or type Student ID, Unique ID or Name',
             'list': 'search-options',
             'autofocus': 'autofocus',
         })
     )
 
 
-class CheckInForm(forms.ModelForm):
+class DeskFormMixin:
+    """
+    Post each field's original value back alongside it, so `changed_data`
+    holds only what this user edited – not what another desk changed while
+    the form was open (see views.save_desk_form).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            if not isinstance(field, forms.FileField):
+                field.show_hidden_initial = True
+
+
+class CheckInForm(DeskFormMixin, forms.ModelForm):
     staff_initials = forms.CharField(
         max_length=10,
         required=False,
@@ -40,7 +54,7 @@ class CheckInForm(forms.ModelForm):
         }
 
 
-class GownForm(forms.ModelForm):
+class GownForm(DeskFormMixin, forms.ModelForm):
     class Meta:
         model = Graduate
         fields = [
@@ -57,7 +71,7 @@ class GownForm(forms.ModelForm):
         }
 
 
-class StudentDetailForm(forms.ModelForm):
+class StudentDetailForm(DeskFormMixin, forms.ModelForm):
     """Combined view/edit form for admin student detail page."""
 
     class Meta:
@@ -67,6 +81,7 @@ class StudentDetailForm(forms.ModelForm):
             'seat_row',
             'seat_number',
             'presentation_order',
+            'stage_channel',
             'gown_size',
             'gown_collected',
             'gown_returned',
@@ -78,6 +93,7 @@ class StudentDetailForm(forms.ModelForm):
             'seat_row': forms.TextInput(attrs={'class': 'form-control'}),
             'seat_number': forms.TextInput(attrs={'class': 'form-control'}),
             'presentation_order': forms.NumberInput(attrs={'class': 'form-control'}),
+            'stage_channel': forms.TextInput(attrs={'class': 'form-control'}),
             'gown_size': forms.TextInput(attrs={'class': 'form-control'}),
             'gown_collected': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'gown_returned': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
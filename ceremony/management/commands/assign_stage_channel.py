@@ -0,0 +1,54 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import transaction
+
+from ceremony.management.utils import add_session_argument, get_session
+from ceremony.models import Graduate, StageState
+
+
+class Command(BaseCommand):
+    help = (
+        "Move graduates to a stage channel, e.g. one stage per group of "
+        "qualifications, and renumber the running orders. Best done before "
+        "the ceremony starts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("channel", help='Stage channel, e.g. "stage-2" (created if new).')
+        parser.add_argument(
+            "--qualification",
+            action="append",
+            default=[],
+            help="Move graduates with this qualification (repeatable).",
+        )
+        parser.add_argument(
+            "--unique-id",
+            action="append",
+            default=[],
+            help="Move the graduate with this Unique ID (repeatable).",
+        )
+        add_session_argument(parser)
+
+    def handle(self, *args, **options):
+        channel = options["channel"]
+        try:
+            validate_slug(channel)
+        except ValidationError:
+            raise CommandError("Channel names may only use letters, numbers, hyphens and underscores.")
+        if len(channel) > Graduate._meta.get_field("stage_channel").max_length:
+            raise CommandError("Channel name is too long.")
+        if not (options["qualification"] or options["unique_id"]):
+            raise CommandError("Give at least one --qualification or --unique-id.")
+
+        session = get_session(options)
+        graduates = session.graduates.filter(unique_id__in=options["unique_id"])
+        if options["qualification"]:
+            graduates |= session.graduates.filter(qualification__in=options["qualification"])
+
+        with transaction.atomic():
+            StageState.for_channel(session.pk, channel)
+            moved = graduates.exclude(stage_channel=channel).update(stage_channel=channel)
+            Graduate.rebuild_stage_positions()
+
+        self.stdout.write(self.style.SUCCESS(f"{moved} graduate(s) moved to {channel} in {session}."))
@@ -0,0 +1,429 @@
+import json
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+import django
+from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from ceremony.forms import CheckInForm, GownForm
+from ceremony.models import DashboardCounter, Graduate, PhotoStatus, Session
+from ceremony.photos import save_renditions
+from ceremony.utils import analyze_database, build_renditions, encode_image
+
+FIRST_NAMES = [
+    "Aroha", "Ben", "Chloe", "Daniel", "Emma", "Finn", "Grace", "Hemi", "Isla", "Jack",
+    "Kiri", "Liam", "Mia", "Noah", "Olivia", "Priya", "Quinn", "Ruby", "Sam", "Tama",
+]
+# Surnames are built from three syllables, so desk searches return a handful of rows
+SYLLABLES = [
+    "an", "bel", "cor", "dun", "el", "far", "gra", "hol", "in", "ker",
+    "lan", "mor", "ner", "ol", "pat", "ran", "ster", "ton", "val", "wick",
+]
+QUALIFICATIONS = [
+    "Bachelor of Arts", "Bachelor of Science", "Bachelor of Commerce",
+    "Master of Engineering", "Doctor of Philosophy", "Graduate Diploma in Teaching",
+]
+GOWN_SIZES = ["XS", "S", "M", "L", "XL"]
+
+# Error text of lock timeouts, deadlocks and serialisation failures (SQLite/PostgreSQL)
+LOCK_ERRORS = ("locked", "deadlock", "lock timeout", "could not serialize")
+
+
+def form_data(form, **changes):
+    """POST body of a desk form as the browser sends it, hidden initial values included."""
+    data = {}
+    for name, field in form.fields.items():
+        if isinstance(field, forms.FileField):
+            continue
+        value = changes.get(name, form[name].value())
+        initial = form.get_initial_for_field(field, name)
+        if value is True:
+            data[name] = "on"
+        elif value not in (None, False):
+            data[name] = value
+        if field.show_hidden_initial:
+            data[form.add_initial_prefix(name)] = "" if initial is None else initial
+    return data
+
+
+def cell(value):
+    return "-" if value is None else value
+
+
+def percentile(quantiles, p):
+    return round(quantiles[p - 1] * 1000, 2) if quantiles else None
+
+
+class Recorder:
+    """Latency, query count and outcome of every request, across threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+        self.lock_errors = Counter()
+
+    def request(self, name, send, *args, **kwargs):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count):
+                response = send(*args, **kwargs)
+        except OperationalError as exc:
+            locked = any(text in str(exc).lower() for text in LOCK_ERRORS)
+            with self.lock:
+                (self.lock_errors if locked else self.errors)[name] += 1
+            return None
+        except Exception:
+            with self.lock:
+                self.errors[name] += 1
+            return None
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            if response.status_code >= 400:
+                self.errors[name] += 1
+            else:
+                self.samples[name].append((elapsed, queries))
+        return response
+
+    def results(self, duration):
+        results = {}
+        for name in sorted(set(self.samples) | set(self.errors) | set(self.lock_errors)):
+            samples = self.samples[name]
+            latencies = sorted(elapsed for elapsed, _ in samples)
+            queries = [count for _, count in samples]
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else []
+            results[name] = {
+                "count": len(samples),
+                "per_second": round(len(samples) / duration, 2),
+                "errors": self.errors[name],
+                "lock_errors": self.lock_errors[name],
+                "p50_ms": percentile(quantiles, 50),
+                "p95_ms": percentile(quantiles, 95),
+                "p99_ms": percentile(quantiles, 99),
+                "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+                "queries_mean": round(statistics.fmean(queries), 1) if queries else None,
+                "queries_max": max(queries) if queries else None,
+            }
+        return results
+
+
+class Traffic:
+    """
+    The ceremony-day mix, one thread per desk, dashboard and display. Check-in
+    desks take arriving graduates from a shared queue and hand them on to
+    the gown desks, like the real line.
+    """
+
+    def __init__(self, options, graduates, recorder, user):
+        self.options = options
+        self.recorder = recorder
+        self.user = user
+        self.lock = threading.Lock()
+        self.arrivals = deque(graduates)
+        self.checked_in = deque()
+        self.stop = threading.Event()
+
+    def client(self):
+        client = Client()
+        client.force_login(self.user)
+        return client
+
+    def run(self):
+        options = self.options
+        roles = (
+            [self.check_in_desk] * options["check_in_desks"]
+            + [self.gown_desk] * options["gown_desks"]
+            + [self.dashboard] * options["dashboards"]
+            + [self.display] * options["displays"]
+            + [self.stage]
+        )
+        threads = [threading.Thread(target=self.worker, args=(role, n)) for n, role in enumerate(roles)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self.stop.wait(options["duration"])
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def worker(self, role, n):
+        try:
+            role(self.client(), random.Random(self.options["seed"] + n))
+        finally:
+            # Each thread has its own connection; the test database can't be dropped while it is open
+            connection.close()
+
+    def every(self, interval, rng):
+        """Pace a loop to `interval` seconds, starting each thread at a random offset."""
+        if self.stop.wait(rng.uniform(0, interval)):
+            return
+        while not self.stop.is_set():
+            started = time.monotonic()
+            yield
+            self.stop.wait(max(interval - (time.monotonic() - started), 0))
+
+    def think(self):
+        if self.options["think"]:
+            self.stop.wait(self.options["think"])
+
+    def check_in_desk(self, client, rng):
+        request = self.recorder.request
+        while not self.stop.is_set():
+            with self.lock:
+                if not self.arrivals:
+                    return
+                pk, unique_id, surname = self.arrivals.popleft()
+
+            if rng.random() < self.options["scan_share"]:
+                request("check_in_scan", client.post, "/check-in/scan/", {"code": unique_id})
+            else:
+                request("check_in_search", client.get, "/check-in/", {"query": surname})
+                request("check_in_detail", client.get, f"/check-in/{pk}/")
+                form = CheckInForm(instance=Graduate.objects.get(pk=pk))
+                data = form_data(form, attended=True, staff_initials=f"D{rng.randint(1, 9)}")
+                request("check_in_save", client.post, f"/check-in/{pk}/", data)
+
+            with self.lock:
+                self.checked_in.append((pk, surname))
+            self.think()
+
+    def gown_desk(self, client, rng):
+        request = self.recorder.request
+        while not self.stop.is_set():
+            with self.lock:
+                next_in_line = self.checked_in.popleft() if self.checked_in else None
+            if next_in_line is None:
+                self.stop.wait(0.05)
+                continue
+            pk, surname = next_in_line
+
+            request("gown_search", client.get, "/gowns/", {"query": surname})
+            request("gown_detail", client.get, f"/gowns/{pk}/")
+            form = GownForm(instance=Graduate.objects.get(pk=pk))
+            request("gown_save", client.post, f"/gowns/{pk}/", form_data(form, gown_collected=True))
+            self.think()
+
+    def dashboard(self, client, rng):
+        for _ in self.every(self.options["dashboard_interval"], rng):
+            self.recorder.request("grad_admin", client.get, "/")
+
+    def stage(self, client, rng):
+        for _ in self.every(self.options["stage_interval"], rng):
+            self.recorder.request("stage_next", client.post, "/stage/control/", {"next": "1"})
+
+    def display(self, client, rng):
+        etag = None
+        for _ in self.every(1.0, rng):
+            headers = {"If-None-Match": etag} if etag else {}
+            response = self.recorder.request(
+                "current_student_api", client.get, "/current-student-api/", {"size": "stage"}, headers=headers
+            )
+            if response is not None:
+                etag = response.get("ETag", etag)
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate ceremony-day traffic against a throwaway test database: "
+        "seed synthetic graduates with photos, then replay desk scans and "
+        "forms, gown desk updates, dashboard refreshes, stage NEXT presses "
+        "and display polling from concurrent threads. Reports latency "
+        "percentiles, queries per request and lock errors per request type."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--graduates", type=int, default=2000, help="Graduates to seed (default: 2000).")
+        parser.add_argument(
+            "--photos", type=int, default=20,
+            help="Distinct synthetic photos, shared round-robin by the graduates (default: 20).",
+        )
+        parser.add_argument(
+            "--ready", type=float, default=0.1,
+            help="Share of graduates already checked in with gowns, i.e. in the running order (default: 0.1).",
+        )
+        parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic (default: 30).")
+        parser.add_argument("--check-in-desks", type=int, default=4, help="Concurrent check-in desks (default: 4).")
+        parser.add_argument("--gown-desks", type=int, default=2, help="Concurrent gown desks (default: 2).")
+        parser.add_argument("--dashboards", type=int, default=1, help="Open grad_admin dashboards (default: 1).")
+        parser.add_argument(
+            "--dashboard-interval", type=float, default=5,
+            help="Seconds between dashboard refreshes (default: 5).",
+        )
+        parser.add_argument("--displays", type=int, default=10, help="Stage displays polling once a second (default: 10).")
+        parser.add_argument(
+            "--stage-interval", type=float, default=3,
+            help="Seconds between stage NEXT presses (default: 3).",
+        )
+        parser.add_argument(
+            "--scan-share", type=float, default=0.5,
+            help="Share of check-ins done by scanning rather than search and form (default: 0.5).",
+        )
+        parser.add_argument(
+            "--think", type=float, default=0,
+            help="Seconds each desk pauses between graduates (default: 0, the door rush).",
+        )
+        parser.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable runs (default: 1).")
+        parser.add_argument("--label", default="", help="Name for this run in the JSON results, e.g. a git commit.")
+        parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON ('-' for stdout).")
+        parser.add_argument(
+            "--baseline", metavar="PATH",
+            help="Earlier --json results to compare p95 latency and queries against.",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix="gradpilot-bench-") as workdir:
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            # A file, not SQLite's shared in-memory database, so locking behaves as in production
+            if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+                test_settings["NAME"] = f"{workdir}/benchmark.sqlite3"
+
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(MEDIA_ROOT=workdir, PHOTO_WORKERS=0):
+                    report = self.benchmark(options)
+            finally:
+                connection.close()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.print_report(report, options)
+        if options["json"]:
+            output = json.dumps(report, indent=2)
+            if options["json"] == "-":
+                self.stdout.write(output)
+            else:
+                with open(options["json"], "w") as f:
+                    f.write(output + "\n")
+
+    def benchmark(self, options):
+        started = time.perf_counter()
+        graduates = self.seed(options)
+        self.stdout.write(
+            f"Seeded {options['graduates']} graduate(s), {len(graduates)} still to arrive, "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+        user = get_user_model().objects.create_superuser("benchmark", "benchmark@example.com", "benchmark")
+        recorder = Recorder()
+        duration = Traffic(options, graduates, recorder, user).run()
+
+        return {
+            "label": options["label"],
+            "time": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "options": {
+                key: options[key]
+                for key in (
+                    "graduates", "photos", "ready", "duration", "check_in_desks", "gown_desks",
+                    "dashboards", "dashboard_interval", "displays", "stage_interval",
+                    "scan_share", "think", "seed",
+                )
+            },
+            "elapsed": round(duration, 2),
+            # Where the ceremony got to, as a check that the traffic really changed things
+            "counters": {key: value for key, value in DashboardCounter.summary(Session.get_default().pk).items() if key != "qualifications"},
+            "results": recorder.results(duration),
+        }
+
+    def seed(self, options):
+        """Synthetic graduates; returns (pk, unique_id, surname) of those still to arrive."""
+        rng = random.Random(options["seed"])
+        session = Session.get_default()
+        photos = [self.seed_photo(rng) for _ in range(options["photos"])]
+        now = timezone.now()
+
+        graduates = []
+        for i in range(options["graduates"]):
+            surname = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+            ready = rng.random() < options["ready"]
+            photo, renditions = photos[i % len(photos)] if photos else ("", {})
+            graduate = Graduate(
+                session=session,
+                name=f"{rng.choice(FIRST_NAMES)} {surname}",
+                email=f"graduate{i}@example.com",
+                qualification=rng.choice(QUALIFICATIONS),
+                student_id=f"{20000000 + i}",
+                unique_id=f"UID{i:06d}",
+                submission_id=f"SUB{i:06d}",
+                gown_option="Hire ($200)" if rng.random() < 0.7 else "Purchase ($350)",
+                gown_size=rng.choice(GOWN_SIZES),
+                photo=photo,
+                photo_status=PhotoStatus.READY if photo else PhotoStatus.NONE,
+                photo_renditions=renditions,
+                attended=ready,
+                check_in_time=now if ready else None,
+                gown_collected=ready,
+            )
+            graduate.refresh_derived_fields()
+            graduates.append(graduate)
+
+        Graduate.objects.bulk_create(graduates, batch_size=500)
+        DashboardCounter.rebuild()
+        Graduate.rebuild_stage_positions()
+        analyze_database()
+
+        arrivals = list(
+            Graduate.objects.filter(attended=False).values_list("pk", "unique_id", "search_surname")
+        )
+        rng.shuffle(arrivals)
+        return arrivals
+
+    def seed_photo(self, rng):
+        """One processed portrait: (photo name, renditions) as after a real upload."""
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        name = default_storage.save("photos/benchmark.jpg", ContentFile(encode_image(Image.new("RGB", (900, 1200), colour))))
+        renditions = save_renditions(build_renditions(default_storage.path(name), webp=settings.PHOTO_WEBP))
+        return name, renditions
+
+    def print_report(self, report, options):
+        baseline = {}
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)["results"]
+
+        self.stdout.write(
+            f"\n{'request':<22} {'count':>7} {'/s':>7} {'errors':>7} {'locked':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for name, result in report["results"].items():
+            line = (
+                f"{name:<22} {result['count']:>7} {result['per_second']:>7} {result['errors']:>7} "
+                f"{result['lock_errors']:>7} {cell(result['p50_ms']):>8} {cell(result['p95_ms']):>8} "
+                f"{cell(result['p99_ms']):>8} {cell(result['queries_mean']):>8}"
+            )
+            before = baseline.get(name)
+            if before and before["p95_ms"] and result["p95_ms"]:
+                change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+                line += f"  p95 {change:+.0f}% vs baseline, queries {before['queries_mean']} → {result['queries_mean']}"
+            self.stdout.write(line)
+
+        counters = ", ".join(f"{key} {value}" for key, value in report["counters"].items())
+        self.stdout.write(f"\nCounters after the run: {counters}.")
+        failures = sum(r["errors"] + r["lock_errors"] for r in report["results"].values())
+        style = self.style.SUCCESS if not failures else self.style.WARNING
+        self.stdout.write(style(f"\n{failures} failed request(s) in {report['elapsed']}s."))
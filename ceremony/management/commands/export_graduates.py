@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ceremony.exports import EXPORT_PRESETS, XLSX_AVAILABLE, csv_chunks, export_rows, write_xlsx
+from ceremony.management.utils import add_session_argument, get_session
+
+
+class Command(BaseCommand):
+    help = (
+        "Export a preset list of graduates (attendance, gowns, payments, ...) "
+        "as CSV or XLSX for finance and the registrar. Rows are read in chunks, "
+        "so memory stays flat whatever the cohort size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("preset", choices=list(EXPORT_PRESETS), help="Which list to export.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "xlsx"],
+            default="csv",
+            help="File format (default: csv). XLSX needs openpyxl installed.",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="File to write (default: stdout for CSV; required for XLSX).",
+        )
+        add_session_argument(parser)
+
+    def handle(self, *args, **options):
+        preset = options["preset"]
+        output = options["output"]
+        session = get_session(options)
+
+        if options["format"] == "xlsx":
+            if not XLSX_AVAILABLE:
+                raise CommandError("XLSX export needs openpyxl: pip install openpyxl")
+            if not output:
+                raise CommandError("--output is required for XLSX.")
+            write_xlsx(preset, session, output)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {output}."))
+            return
+
+        if not output:
+            for chunk in csv_chunks(export_rows(preset, session)):
+                self.stdout.write(chunk, ending="")
+            return
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            for chunk in csv_chunks(export_rows(preset, session)):
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {output}."))
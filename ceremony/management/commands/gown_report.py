@@ -0,0 +1,45 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from ceremony.management.utils import add_session_argument, get_session
+from ceremony.models import Graduate, GownType
+
+REPORT_FIELDS = ["unique_id", "display_name", "student_id", "email", "gown_size", "gown_notes"]
+
+
+class Command(BaseCommand):
+    help = (
+        "List hired gowns that were collected but not yet returned, for "
+        "reconciling the gown desk at the end of the day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--csv",
+            action="store_true",
+            help="Write the list as CSV (e.g. > outstanding.csv) instead of a table.",
+        )
+        add_session_argument(parser)
+
+    def handle(self, *args, **options):
+        graduates = Graduate.objects.filter(session=get_session(options))
+        outstanding = graduates.hire_outstanding().order_by("unique_id").values_list(*REPORT_FIELDS)
+
+        if options["csv"]:
+            writer = csv.writer(self.stdout)
+            writer.writerow(REPORT_FIELDS)
+            writer.writerows(outstanding)
+            return
+
+        hires = graduates.filter(gown_type=GownType.HIRE)
+        count = 0
+        for unique_id, name, student_id, email, size, notes in outstanding.iterator():
+            count += 1
+            line = f"{unique_id:<12} {name:<35} {student_id:<12} {size:<6}"
+            self.stdout.write(f"{line} {' '.join(notes.split())}".rstrip())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} hired gown(s) outstanding. "
+            f"Hired: {hires.count()}, not yet collected: {hires.filter(gown_collected=False).count()}."
+        ))
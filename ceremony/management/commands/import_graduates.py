@@ -1,17 +1,38 @@
 import csv
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from contextlib import nullcontext
 from decimal import Decimal
 from datetime import datetime
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
-from ceremony.models import Graduate
+from ceremony.management.utils import add_session_argument, get_session
+from ceremony.models import ChangeSequence, DashboardCounter, Graduate, StageState
+from ceremony.utils import analyze_database
+
+# Columns filled by Graduate.refresh_derived_fields() from imported ones
+DERIVED_FIELDS = Graduate.DERIVED_FIELDS
+
+
+def row_hash(data):
+    """Stable fingerprint of a mapped CSV row, stored as Graduate.import_hash."""
+    canonical = json.dumps({k: str(v) for k, v in data.items()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 class Command(BaseCommand):
     help = (
-        "Import graduates from a CSV exported from your Excel bookings sheet. "
-        "Existing rows are matched by Unique ID and updated."
+        "Import graduates from a CSV exported from your Excel bookings sheet "
+        "into a ceremony session. Existing rows of the session are matched by "
+        "Unique ID and updated. The file is read "
+        "in batches; rows whose content hash is unchanged are skipped and only "
+        "changed fields are written."
     )
 
     def add_arguments(self, parser):
@@ -20,17 +41,61 @@ class Command(BaseCommand):
             type=str,
             help="Path to the CSV file (export from Excel).",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows read, diffed and written per batch (default: 500).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be created/updated (with a per-field diff) without writing.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help=(
+                "Commit each batch separately and record progress next to the CSV, "
+                "so re-running with --resume continues after an interruption."
+            ),
+        )
+        add_session_argument(parser)
 
     def handle(self, *args, **options):
         csv_path = options["csv_path"]
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        resume = options["resume"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if dry_run and resume:
+            raise CommandError("--dry-run and --resume cannot be combined")
+        session = get_session(options)
+        self.stdout.write(f"Importing into {session}.")
 
         try:
             f = open(csv_path, newline="", encoding="utf-8-sig")
         except FileNotFoundError:
             raise CommandError(f"File not found: {csv_path}")
 
-        created = 0
-        updated = 0
+        checkpoint_path = f"{csv_path}.progress"
+        signature = f"{self.file_signature(csv_path)}:{session.pk}"
+        rows_done = 0
+        totals = Counter()
+        field_changes = Counter()
+
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as cp:
+                checkpoint = json.load(cp)
+            if checkpoint.get("signature") == signature:
+                rows_done = checkpoint["rows_done"]
+                totals.update(checkpoint["totals"])
+                self.stdout.write(f"Resuming after row {rows_done + 1}.")
+            else:
+                self.stdout.write(self.style.WARNING(
+                    "CSV changed since the last run – ignoring the saved progress."
+                ))
 
         with f:
             reader = csv.DictReader(f)
@@ -60,44 +125,160 @@ class Command(BaseCommand):
                     "Check your header row names match the ones used in the import script."
                 ))
 
-            for row_num, row in enumerate(reader, start=2):  # header is row 1
-                data = {}
-
-                for csv_col, field_name in header_map.items():
-                    if csv_col not in row:
-                        continue
-
-                    raw_value = (row[csv_col] or "").strip()
-
-                    if field_name == "submission_date":
-                        data[field_name] = self.parse_date(raw_value)
-                    elif field_name == "additional_guests":
-                        data[field_name] = self.parse_int(raw_value, default=0)
-                    elif field_name == "total_amount":
-                        data[field_name] = self.parse_decimal(raw_value, default=Decimal("0"))
-                    else:
-                        data[field_name] = raw_value
-
-                unique_id = data.get("unique_id")
-                if not unique_id:
-                    self.stdout.write(self.style.WARNING(
-                        f"Row {row_num}: missing Unique ID – skipping."
-                    ))
-                    continue
-
-                grad, created_flag = Graduate.objects.update_or_create(
-                    unique_id=unique_id,
-                    defaults=data,
-                )
-
-                if created_flag:
-                    created += 1
-                else:
-                    updated += 1
-
-        self.stdout.write(self.style.SUCCESS(
-            f"Import completed. Created: {created}, Updated: {updated}"
-        ))
+            # Without --resume the whole file is one transaction (all or nothing)
+            outer = nullcontext() if resume or dry_run else transaction.atomic()
+            with outer:
+                # header is row 1, data starts on row 2
+                numbered = islice(enumerate(reader, start=2), rows_done, None)
+                while True:
+                    chunk = list(islice(numbered, batch_size))
+                    if not chunk:
+                        break
+
+                    # unique_id → mapped field values; a later row for the same ID wins
+                    rows = {}
+                    for row_num, row in chunk:
+                        data = self.map_row(row, header_map)
+                        if not data.get("unique_id"):
+                            self.stdout.write(self.style.WARNING(
+                                f"Row {row_num}: missing Unique ID – skipping."
+                            ))
+                            continue
+                        rows[data["unique_id"]] = data
+
+                    with transaction.atomic() if resume else nullcontext():
+                        totals.update(self.apply(session, rows, batch_size, dry_run, field_changes))
+
+                    rows_done += len(chunk)
+                    if resume:
+                        with open(checkpoint_path, "w") as cp:
+                            json.dump({"signature": signature, "rows_done": rows_done, "totals": totals}, cp)
+
+        if resume and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        summary = (
+            f"Created: {totals['created']}, Updated: {totals['updated']}, "
+            f"Unchanged: {totals['unchanged']}"
+        )
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run – nothing written. Would have {summary}"))
+            for name, count in field_changes.most_common():
+                self.stdout.write(f"  {name}: changed on {count} row(s)")
+        else:
+            # The first import into a new database leaves the planner without statistics
+            analyze_database()
+            self.stdout.write(self.style.SUCCESS(f"Import completed. {summary}"))
+
+    def map_row(self, row, header_map):
+        data = {}
+
+        for csv_col, field_name in header_map.items():
+            if csv_col not in row:
+                continue
+
+            raw_value = (row[csv_col] or "").strip()
+
+            if field_name == "submission_date":
+                data[field_name] = self.parse_date(raw_value)
+            elif field_name == "additional_guests":
+                data[field_name] = self.parse_int(raw_value, default=0)
+            elif field_name == "total_amount":
+                data[field_name] = self.parse_decimal(raw_value, default=Decimal("0"))
+            else:
+                data[field_name] = raw_value
+
+        return data
+
+    def apply(self, session, rows, batch_size, dry_run, field_changes):
+        """
+        Diff one batch of mapped rows against the database and write the
+        difference with bulk_create/bulk_update. Rows whose stored import
+        hash matches are skipped without loading them. Graduate.save() is
+        bypassed: imports never touch photos, attendance or gown status, so
+        only the derived columns and the dashboard counters
+        need updating here.
+        """
+        hashes = {unique_id: row_hash(data) for unique_id, data in rows.items()}
+        graduates = Graduate.objects.filter(session=session)
+        stored = dict(
+            graduates.filter(unique_id__in=list(rows)).values_list("unique_id", "import_hash")
+        )
+        pending = [uid for uid in rows if uid not in stored or stored[uid] != hashes[uid]]
+        # unique_id is only unique per session, so in_bulk(field_name=...) can't be used
+        existing = {
+            grad.unique_id: grad
+            for grad in graduates.filter(unique_id__in=[uid for uid in pending if uid in stored])
+        }
+
+        to_create = []
+        # changed field names → graduates needing exactly those columns written
+        to_update = defaultdict(list)
+        unchanged = len(rows) - len(pending)
+        # Dashboard counters move with qualification / gown option changes
+        counters = Counter()
+
+        for unique_id in pending:
+            data = rows[unique_id]
+            grad = existing.get(unique_id)
+            if grad is None:
+                grad = Graduate(**data, session=session, import_hash=hashes[unique_id])
+                grad.refresh_derived_fields()
+                to_create.append(grad)
+                counters.update(grad.counter_keys())
+                if dry_run:
+                    self.stdout.write(f"+ {unique_id}: new graduate {data.get('name', '')!r}")
+                continue
+
+            changed = [name for name, value in data.items() if getattr(grad, name) != value]
+            if dry_run:
+                for name in changed:
+                    self.stdout.write(f"~ {unique_id}: {name}: {getattr(grad, name)!r} → {data[name]!r}")
+            field_changes.update(changed)
+
+            before = {name: getattr(grad, name) for name in DERIVED_FIELDS}
+            counters.subtract(grad.counter_keys())
+            for name in changed:
+                setattr(grad, name, data[name])
+            grad.refresh_derived_fields()
+            counters.update(grad.counter_keys())
+            changed += [name for name in DERIVED_FIELDS if getattr(grad, name) != before[name]]
+            if not changed:
+                # Same values, hash just not recorded yet (e.g. first run after upgrading)
+                unchanged += 1
+            grad.import_hash = hashes[unique_id]
+            to_update[tuple(changed + ["import_hash"])].append(grad)
+
+        updated = sum(len(grads) for fields, grads in to_update.items() if fields != ("import_hash",))
+        if dry_run:
+            return {"created": len(to_create), "updated": updated, "unchanged": unchanged}
+
+        with transaction.atomic():
+            # The whole batch shares one roster change number (see desk_roster)
+            roster_updates = [fields for fields in to_update if set(fields) & set(Graduate.ROSTER_FIELDS)]
+            if to_create or roster_updates:
+                seq = ChangeSequence.next(Graduate.ROSTER_SEQUENCE)
+                for grad in to_create:
+                    grad.change_seq = seq
+                for fields in roster_updates:
+                    for grad in to_update[fields]:
+                        grad.change_seq = seq
+                    to_update[fields + ("change_seq",)] = to_update.pop(fields)
+
+            Graduate.objects.bulk_create(to_create, batch_size=batch_size)
+            for fields, grads in to_update.items():
+                Graduate.objects.bulk_update(grads, fields, batch_size=batch_size)
+            DashboardCounter.apply(counters)
+
+            # Re-publish if the graduate on screen was renamed by this import
+            StageState.republish_if_showing(session.pk, {g.pk for grads in to_update.values() for g in grads})
+
+        return {"created": len(to_create), "updated": updated, "unchanged": unchanged}
+
+    @staticmethod
+    def file_signature(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
 
     # ---------- helper parsers ---------- #
 
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ceremony.management.utils import add_session_argument, get_session
+from ceremony.models import Graduate, PhotoStatus, StageState
+from ceremony.photos import delete_files, delete_unreferenced, save_renditions
+from ceremony.utils import build_renditions
+
+PHOTO_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Attach a batch of student photos from a folder or .zip. Files are "
+        "matched to graduates of a session by file name (Student ID or Unique ID, "
+        "e.g. S12345.jpg) and rendered in parallel across all CPU cores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            type=str,
+            help="Folder or .zip file containing the photos.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes used to render photos (default: all cores).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Graduates written per bulk UPDATE (default: 200).",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Also replace photos of graduates who already have one.",
+        )
+        add_session_argument(parser)
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.exists():
+            raise CommandError(f"Not found: {source}")
+        self.session = get_session(options)
+
+        if source.is_dir():
+            self.ingest(source, options)
+        elif zipfile.is_zipfile(source):
+            with tempfile.TemporaryDirectory() as tmp:
+                with zipfile.ZipFile(source) as archive:
+                    archive.extractall(tmp)
+                self.ingest(Path(tmp), options)
+        else:
+            raise CommandError(f"{source} is neither a folder nor a .zip file")
+
+    def ingest(self, folder, options):
+        files = sorted(
+            p for p in folder.rglob("*")
+            if p.is_file() and p.suffix.lower() in PHOTO_EXTENSIONS and not p.name.startswith(".")
+        )
+
+        # Both ID columns → graduate pk; an ID shared by several graduates is ambiguous
+        by_id = {}
+        ambiguous_ids = set()
+        graduates = Graduate.objects.filter(session=self.session)
+        for pk, student_id, unique_id in graduates.values_list("pk", "student_id", "unique_id"):
+            for key in {student_id.strip(), unique_id.strip()} - {""}:
+                if key in by_id and by_id[key] != pk:
+                    ambiguous_ids.add(key)
+                by_id[key] = pk
+
+        skip = set()
+        if not options["replace"]:
+            skip = set(graduates.exclude(photo_status=PhotoStatus.NONE).values_list("pk", flat=True))
+
+        jobs = {}
+        unmatched, ambiguous, skipped = [], [], []
+        for path in files:
+            stem = path.stem.strip()
+            if stem in ambiguous_ids:
+                ambiguous.append(path.name)
+            elif stem not in by_id:
+                unmatched.append(path.name)
+            elif by_id[stem] in skip:
+                skipped.append(path.name)
+            else:
+                # Last file wins if a graduate has several
+                jobs[by_id[stem]] = path
+
+        self.stdout.write(f"{len(files)} photo(s) found, {len(jobs)} to process.")
+
+        corrupt = []
+        pending = []
+        attached = 0
+        with ProcessPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            futures = {
+                pool.submit(build_renditions, str(path), settings.PHOTO_WEBP): (pk, path)
+                for pk, path in jobs.items()
+            }
+            for future in as_completed(futures):
+                pk, path = futures[future]
+                try:
+                    renditions = future.result()
+                except Exception as exc:
+                    corrupt.append(f"{path.name} ({exc})")
+                    continue
+
+                with open(path, "rb") as f:
+                    photo_name = default_storage.save(f"photos/{path.name}", File(f))
+                pending.append(Graduate(
+                    pk=pk,
+                    photo=photo_name,
+                    photo_status=PhotoStatus.READY,
+                    photo_renditions=save_renditions(renditions),
+                ))
+                if len(pending) >= options["batch_size"]:
+                    attached += self.attach(pending, options["batch_size"])
+                    pending = []
+
+        attached += self.attach(pending, options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Attached {attached} photo(s)."))
+        for label, names in [
+            ("Skipped (already have a photo, use --replace)", skipped),
+            ("No matching graduate", unmatched),
+            ("Matches several graduates", ambiguous),
+            ("Could not be processed", corrupt),
+        ]:
+            if names:
+                self.stdout.write(self.style.WARNING(f"{label}: {len(names)}"))
+                for name in names:
+                    self.stdout.write(f"  {name}")
+
+    def attach(self, graduates, batch_size):
+        """Write one batch of processed photos and drop the files they replace."""
+        if not graduates:
+            return 0
+
+        previous = Graduate.objects.in_bulk([g.pk for g in graduates])
+        with transaction.atomic():
+            Graduate.objects.bulk_update(
+                graduates, ["photo", "photo_status", "photo_renditions"], batch_size=batch_size
+            )
+            StageState.republish_if_showing(self.session.pk, previous)
+
+        # Renditions may be shared with other graduates, the originals are not
+        delete_unreferenced({name for old in previous.values() for name in old.photo_renditions.values()})
+        delete_files({old.photo.name for old in previous.values() if old.photo} - {g.photo.name for g in graduates})
+        return len(graduates)
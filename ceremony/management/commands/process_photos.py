@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ceremony.models import Graduate, PhotoStatus
+from ceremony.photos import process_pending_photo, rerender_photo
+
+
+class Command(BaseCommand):
+    help = (
+        "Process photos still waiting in the background queue, e.g. after a "
+        "restart or when PHOTO_WORKERS = 0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry photos that failed to process earlier.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help=(
+                "Re-render every photo, e.g. after upgrading or changing rendition sizes. "
+                "Graduates keep their current renditions until the new ones are stored."
+            ),
+        )
+        parser.add_argument(
+            "--watch",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running, checking for new uploads every SECONDS.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.drain(options["retry_failed"], options["rebuild"])
+            options["rebuild"] = False
+            if processed or not options["watch"]:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} photo(s)."))
+            if not options["watch"]:
+                break
+            time.sleep(options["watch"])
+
+    def drain(self, retry_failed, rebuild):
+        processed = []
+        if rebuild:
+            # In place, so stage and desks never go without a photo meanwhile
+            processed = list(
+                Graduate.objects.filter(photo_status__in=[PhotoStatus.READY, PhotoStatus.FAILED])
+                .values_list("pk", flat=True)
+            )
+            for pk in processed:
+                rerender_photo(pk)
+        elif retry_failed:
+            Graduate.objects.filter(photo_status=PhotoStatus.FAILED).update(photo_status=PhotoStatus.PENDING)
+
+        pending = list(
+            Graduate.objects.filter(photo_status=PhotoStatus.PENDING).values_list("pk", flat=True)
+        )
+        for pk in pending:
+            process_pending_photo(pk)
+        return len(processed) + len(pending)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ceremony.models import DashboardCounter, Session
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the grad_admin dashboard totals from scratch. Only needed "
+        "after editing graduates outside the app."
+    )
+
+    def handle(self, *args, **options):
+        totals = DashboardCounter.rebuild()
+        for session in Session.objects.select_related("ceremony"):
+            total = totals[DashboardCounter.session_key(session.pk, "total")]
+            checked_in = totals[DashboardCounter.session_key(session.pk, "checked_in")]
+            self.stdout.write(f"{session}: {total} graduates, {checked_in} checked in.")
+        self.stdout.write(self.style.SUCCESS("Dashboard counters rebuilt."))
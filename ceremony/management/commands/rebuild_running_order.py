@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ceremony.models import Graduate
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the running order of every stage channel from scratch. Only needed after "
+        "editing attendance or gown status outside the app."
+    )
+
+    def handle(self, *args, **options):
+        Graduate.rebuild_stage_positions()
+        total = Graduate.objects.filter(stage_position__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(f"Running order rebuilt. {total} graduates ready for stage."))
@@ -0,0 +1,23 @@
+from django.core.exceptions import MultipleObjectsReturned
+from django.core.management.base import CommandError
+
+from ceremony.models import Session
+
+
+def add_session_argument(parser):
+    parser.add_argument(
+        "--session",
+        help="Ceremony session, by id or name (default: the newest session not archived).",
+    )
+
+
+def get_session(options):
+    """The session named by --session, or the default one."""
+    if not options["session"]:
+        return Session.get_default()
+    try:
+        return Session.lookup(options["session"])
+    except Session.DoesNotExist:
+        raise CommandError(f"No session {options['session']!r}.")
+    except MultipleObjectsReturned:
+        raise CommandError(f"Several sessions are called {options['session']!r} – use the id.")
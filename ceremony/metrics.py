@@ -0,0 +1,287 @@
+"""
+Opt-in request metrics (settings.METRICS_ENABLED): per-view wall time, DB
+queries and time, template render time and response size, kept in memory
+for the ops page (views.ops_metrics) and a Prometheus endpoint
+(views.prometheus_metrics). Figures are per worker process.
+"""
+import re
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+from django.utils import timezone
+
+# Upper bounds (seconds) of the Prometheus latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Samples kept per flagged request, and the SQL shown for each
+FLAG_DETAIL_LIMIT = 3
+FLAG_SQL_LENGTH = 200
+
+_LIST_OF_PARAMS = re.compile(r'(%s, )+%s')
+
+# The stats of the request being handled; contextvars follow it into sync_to_async threads
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    """What one request did, filled in by record_query and TimedTemplate."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self.slow = []
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute_wrapper: time each query of a measured request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.db_time += elapsed
+        # Same statement whatever the IN (...) list length
+        stats.statements[_LIST_OF_PARAMS.sub('%s...', sql)] += 1
+        if elapsed * 1000 >= settings.METRICS_SLOW_QUERY_MS and len(stats.slow) < FLAG_DETAIL_LIMIT:
+            stats.slow.append({'sql': sql[:FLAG_SQL_LENGTH], 'ms': round(elapsed * 1000, 1)})
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate:
+    """A Django template whose render time is added to the current request's stats."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+
+class TimedTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render (includes are part of it)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class MetricsStore:
+    """
+    The last METRICS_BUFFER_SIZE requests (for percentiles and flagged
+    requests), plus running totals per view for Prometheus.
+    """
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=size)
+        self.totals = {}
+        self.started = timezone.now()
+
+    def record(self, sample):
+        with self.lock:
+            self.recent.append(sample)
+            totals = self.totals.get(sample['view'])
+            if totals is None:
+                totals = self.totals[sample['view']] = {
+                    'count': 0, 'errors': 0, 'seconds': 0.0, 'queries': 0, 'db_seconds': 0.0,
+                    'template_seconds': 0.0, 'bytes': 0,
+                    'buckets': [0] * len(LATENCY_BUCKETS), 'flags': Counter(),
+                }
+            totals['count'] += 1
+            totals['errors'] += sample['status'] >= 500
+            totals['seconds'] += sample['seconds']
+            totals['queries'] += sample['queries']
+            totals['db_seconds'] += sample['db_seconds']
+            totals['template_seconds'] += sample['template_seconds']
+            totals['bytes'] += sample['bytes'] or 0
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if sample['seconds'] <= bound:
+                    totals['buckets'][i] += 1
+            totals['flags'].update(sample['flags'].keys())
+
+    def summary(self):
+        """Per-view figures over the recent requests, slowest p95 first."""
+        with self.lock:
+            recent = list(self.recent)
+
+        by_view = {}
+        for sample in recent:
+            by_view.setdefault(sample['view'], []).append(sample)
+
+        rows = []
+        for view, samples in by_view.items():
+            latencies = sorted(s['seconds'] * 1000 for s in samples)
+            quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+            count = len(samples)
+            rows.append({
+                'view': view,
+                'count': count,
+                'errors': sum(s['status'] >= 500 for s in samples),
+                'p50_ms': quantiles[49],
+                'p95_ms': quantiles[94],
+                'p99_ms': quantiles[98],
+                'queries': sum(s['queries'] for s in samples) / count,
+                'db_ms': sum(s['db_seconds'] for s in samples) * 1000 / count,
+                'template_ms': sum(s['template_seconds'] for s in samples) * 1000 / count,
+                'kb': sum(s['bytes'] or 0 for s in samples) / 1024 / count,
+                'flagged': sum(bool(s['flags']) for s in samples),
+            })
+        rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+        flagged = [sample for sample in reversed(recent) if sample['flags']]
+        return rows, flagged, len(recent)
+
+    def prometheus(self):
+        """Running totals in the Prometheus text exposition format."""
+        with self.lock:
+            totals = {view: {**t, 'buckets': list(t['buckets']), 'flags': Counter(t['flags'])}
+                      for view, t in self.totals.items()}
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        def label(view, **extra):
+            labels = {'view': view, **extra}
+            return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+        histogram = []
+        for view, t in totals.items():
+            for bound, count in zip(LATENCY_BUCKETS, t['buckets']):
+                histogram.append(f'gradpilot_request_duration_seconds_bucket{label(view, le=bound)} {count}')
+            histogram.append(f'gradpilot_request_duration_seconds_bucket{label(view, le="+Inf")} {t["count"]}')
+            histogram.append(f'gradpilot_request_duration_seconds_sum{label(view)} {t["seconds"]:.6f}')
+            histogram.append(f'gradpilot_request_duration_seconds_count{label(view)} {t["count"]}')
+        metric('gradpilot_request_duration_seconds', 'histogram', 'Request wall time per view.', histogram)
+
+        for name, key, help_text in (
+            ('gradpilot_request_errors_total', 'errors', 'Responses with a 5xx status per view.'),
+            ('gradpilot_db_queries_total', 'queries', 'Database queries per view.'),
+            ('gradpilot_db_seconds_total', 'db_seconds', 'Time spent in database queries per view.'),
+            ('gradpilot_template_seconds_total', 'template_seconds', 'Template render time per view.'),
+            ('gradpilot_response_bytes_total', 'bytes', 'Response body bytes per view (streams excluded).'),
+        ):
+            metric(name, 'counter', help_text, [f'{name}{label(view)} {t[key]}' for view, t in totals.items()])
+
+        metric('gradpilot_request_flags_total', 'counter', 'Requests flagged for repeated or slow queries.', [
+            f'gradpilot_request_flags_total{label(view, flag=flag)} {count}'
+            for view, t in totals.items() for flag, count in t['flags'].items()
+        ])
+        return '\n'.join(lines) + '\n'
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetricsStore(settings.METRICS_BUFFER_SIZE)
+        return _store
+
+
+class MetricsMiddleware:
+    """
+    Measure every request (see the module docstring). Works for sync and
+    async views alike, so the stage's async endpoints stay async under ASGI.
+    Listed first in MIDDLEWARE, so the time includes the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(install_query_wrapper, dispatch_uid='ceremony.metrics')
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+        self.store = get_store()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, seconds):
+        match = request.resolver_match
+        flags = {}
+        repeated = [
+            {'sql': sql[:FLAG_SQL_LENGTH], 'count': count}
+            for sql, count in stats.statements.most_common(FLAG_DETAIL_LIMIT)
+            if count >= settings.METRICS_REPEATED_QUERY_THRESHOLD
+        ]
+        if repeated:
+            flags['n_plus_one'] = repeated
+        if stats.slow:
+            flags['slow_query'] = stats.slow
+
+        self.store.record({
+            'time': timezone.now(),
+            'view': (match.view_name or match._func_path) if match else '(unresolved)',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'seconds': seconds,
+            'queries': stats.queries,
+            'db_seconds': stats.db_time,
+            'template_seconds': stats.template_time,
+            'bytes': None if response.streaming else len(response.content),
+            'flags': flags,
+        })
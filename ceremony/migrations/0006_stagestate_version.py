@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0005_graduate_qualification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagestate',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every change so displays can skip unchanged polls'),
+        ),
+    ]
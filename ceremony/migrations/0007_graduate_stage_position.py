@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+def fill_stage_positions(apps, schema_editor):
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    ready = list(
+        Graduate.objects.filter(attended=True, gown_collected=True).order_by('unique_id').only('pk')
+    )
+    for position, graduate in enumerate(ready, start=1):
+        graduate.stage_position = position
+    Graduate.objects.bulk_update(ready, ['stage_position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0006_stagestate_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduate',
+            name='stage_position',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, help_text='1-based place in the stage running order (empty = not ready for stage)', null=True),
+        ),
+        migrations.RunPython(fill_stage_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+from ceremony.utils import normalize_search
+
+
+def fill_search_fields(apps, schema_editor):
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    graduates = list(Graduate.objects.only('pk', 'name'))
+    for graduate in graduates:
+        graduate.search_name = normalize_search(graduate.name)
+        graduate.search_surname = graduate.search_name.rsplit(' ', 1)[-1]
+    Graduate.objects.bulk_update(graduates, ['search_name', 'search_surname'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0007_graduate_stage_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduate',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='graduate',
+            name='search_surname',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='student_id',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0008_graduate_search_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='graduate',
+            name='submission_id',
+            field=models.CharField(blank=True, db_index=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0009_graduate_submission_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduate',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:52
+
+from django.db import migrations, models
+
+
+def mark_existing_photos_ready(apps, schema_editor):
+    # Photos uploaded so far were processed inline by Graduate.save()
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    Graduate.objects.exclude(photo='').exclude(photo__isnull=True).update(photo_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0010_graduate_import_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduate',
+            name='photo_status',
+            field=models.CharField(blank=True, choices=[('', 'No photo'), ('pending', 'Processing'), ('ready', 'Ready'), ('failed', 'Could not process')], db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(mark_existing_photos_ready, migrations.RunPython.noop),
+    ]
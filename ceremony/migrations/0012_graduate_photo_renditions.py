@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0011_graduate_photo_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduate',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:57
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_graduates(apps, schema_editor):
+    # Same rules as Graduate.counter_keys(), expressed as aggregates
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    DashboardCounter = apps.get_model('ceremony', 'DashboardCounter')
+    hire = Q(gown_option__icontains='hire')
+    counters = {
+        'total': Count('id'),
+        'checked_in': Count('id', filter=Q(attended=True)),
+        'gown_collected': Count('id', filter=Q(gown_collected=True)),
+        'gown_returned': Count('id', filter=Q(gown_returned=True)),
+        'gown_to_return': Count('id', filter=hire),
+        'gown_outstanding': Count('id', filter=hire & Q(gown_collected=True, gown_returned=False)),
+    }
+    # Aliases must not shadow the field names used in the filters
+    totals = {
+        key.removeprefix('n_'): value
+        for key, value in Graduate.objects.aggregate(
+            **{f'n_{key}': count for key, count in counters.items()}
+        ).items()
+    }
+    rows = Graduate.objects.values('qualification').annotate(
+        **{f'n_{key}': counters[key] for key in ('total', 'checked_in', 'gown_collected')}
+    )
+    for row in rows:
+        qualification = row['qualification'] or ''
+        for counter in ('total', 'checked_in', 'gown_collected'):
+            key = f'qualification:{counter}:{qualification}'
+            totals[key] = totals.get(key, 0) + row[f'n_{counter}']
+
+    DashboardCounter.objects.bulk_create(
+        DashboardCounter(key=key, value=value) for key, value in totals.items() if value
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0012_graduate_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_graduates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0013_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['attended', 'unique_id'], name='grad_attended_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['gown_collected', 'unique_id'], name='grad_gown_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['search_name', 'unique_id'], name='grad_name_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['gown_collected', 'gown_returned', 'unique_id'], name='grad_gown_out_uid_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+
+def derive_gown_type(apps, schema_editor):
+    # Same rules as GownType.from_option(), copied because migrations can't use
+    # model methods; done in Python so whitespace-only answers stay '' as there
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    graduates = []
+    for graduate in Graduate.objects.exclude(gown_option='').only('gown_option').iterator():
+        option = graduate.gown_option.lower()
+        if 'hire' in option:
+            graduate.gown_type = 'hire'
+        elif 'purchase' in option:
+            graduate.gown_type = 'purchase'
+        elif option.strip():
+            graduate.gown_type = 'other'
+        else:
+            continue
+        graduates.append(graduate)
+    Graduate.objects.bulk_update(graduates, ['gown_type'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0014_graduate_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_gown_out_uid_idx',
+        ),
+        migrations.AddField(
+            model_name='graduate',
+            name='gown_type',
+            field=models.CharField(blank=True, choices=[('', 'Not chosen'), ('hire', 'Hire'), ('purchase', 'Purchase'), ('other', 'Other')], default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(derive_gown_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['gown_type', 'gown_collected', 'gown_returned', 'unique_id'], name='grad_gown_type_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0016_roster_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraduateEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('check_in', 'Checked in'), ('undo_check_in', 'Check-in undone'), ('gown_collected', 'Gown collected'), ('undo_gown_collected', 'Gown collection undone'), ('gown_returned', 'Gown returned'), ('undo_gown_returned', 'Gown return undone'), ('stage_shown', 'Shown on stage')], max_length=20)),
+                ('source', models.CharField(blank=True, choices=[('', 'Other'), ('check_in', 'Check-in desk'), ('gown', 'Gown desk'), ('admin', 'Grad admin'), ('stage', 'Stage control')], max_length=10)),
+                ('actor', models.CharField(blank=True, max_length=100)),
+                ('time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('graduate', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='ceremony.graduate')),
+            ],
+            options={
+                'ordering': ['-time'],
+                'indexes': [models.Index(fields=['time', 'kind'], name='event_time_idx'), models.Index(fields=['graduate', 'time'], name='event_graduate_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,193 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+
+def assign_default_session(apps, schema_editor):
+    # Existing data becomes the first session, as Session.get_default() would create it
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    StageState = apps.get_model('ceremony', 'StageState')
+    GraduateEvent = apps.get_model('ceremony', 'GraduateEvent')
+    DashboardCounter = apps.get_model('ceremony', 'DashboardCounter')
+    if not (Graduate.objects.exists() or StageState.objects.exists() or GraduateEvent.objects.exists()):
+        return
+
+    Ceremony = apps.get_model('ceremony', 'Ceremony')
+    Session = apps.get_model('ceremony', 'Session')
+    session = Session.objects.create(ceremony=Ceremony.objects.create(name='Graduation'), name='Main session')
+    Graduate.objects.update(session=session)
+    StageState.objects.update(session=session)
+    GraduateEvent.objects.update(session=session)
+    # Counter keys now start with the session (DashboardCounter.session_key)
+    DashboardCounter.objects.update(key=Concat(Value(f'{session.pk}:'), 'key'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0017_graduate_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ceremony',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-date', '-pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Session',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('starts_at', models.DateTimeField(blank=True, null=True)),
+                ('archived', models.BooleanField(default=False, help_text='Past session: kept for the records, no longer offered to the desks')),
+            ],
+            options={
+                'ordering': ['-ceremony__date', 'starts_at', 'pk'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_attended_uid_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_gown_uid_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_name_uid_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_gown_type_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='graduateevent',
+            name='event_time_idx',
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='search_surname',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='stage_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="1-based place in the session's running order (empty = not ready for stage)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='student_id',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='submission_id',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='unique_id',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='ceremony',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='ceremony.ceremony'),
+        ),
+        migrations.AddField(
+            model_name='graduate',
+            name='session',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='graduates', to='ceremony.session'),
+        ),
+        migrations.AddField(
+            model_name='graduateevent',
+            name='session',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='ceremony.session'),
+        ),
+        migrations.AddField(
+            model_name='stagestate',
+            name='session',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stage_state', to='ceremony.session'),
+        ),
+        migrations.RunPython(assign_default_session, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='graduate',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='graduates', to='ceremony.session'),
+        ),
+        migrations.AlterField(
+            model_name='graduateevent',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='ceremony.session'),
+        ),
+        migrations.AlterField(
+            model_name='stagestate',
+            name='session',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stage_state', to='ceremony.session'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'search_name', 'unique_id'], name='grad_name_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'search_surname'], name='grad_surname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'student_id'], name='grad_student_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'submission_id'], name='grad_submission_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'attended', 'unique_id'], name='grad_attended_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'gown_collected', 'unique_id'], name='grad_gown_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'gown_type', 'gown_collected', 'gown_returned', 'unique_id'], name='grad_gown_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'stage_position'], name='grad_stage_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'change_seq'], name='grad_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='graduateevent',
+            index=models.Index(fields=['session', 'time', 'kind'], name='event_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='graduate',
+            constraint=models.UniqueConstraint(fields=('session', 'unique_id'), name='grad_session_uid_uniq'),
+        ),
+    ]
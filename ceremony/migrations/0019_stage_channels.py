@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0018_ceremony_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='stagestate',
+            options={'ordering': ['session', 'channel']},
+        ),
+        migrations.RemoveIndex(
+            model_name='graduate',
+            name='grad_stage_position_idx',
+        ),
+        migrations.AddField(
+            model_name='graduate',
+            name='stage_channel',
+            field=models.SlugField(db_index=False, default='main', help_text='Stage (StageState channel) this graduate crosses, e.g. "main" or "stage-2"', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='stagestate',
+            name='channel',
+            field=models.SlugField(db_index=False, default='main', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='graduate',
+            name='stage_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="1-based place in its stage channel's running order (empty = not ready for stage)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='stagestate',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_channels', to='ceremony.session'),
+        ),
+        migrations.AddIndex(
+            model_name='graduate',
+            index=models.Index(fields=['session', 'stage_channel', 'stage_position'], name='grad_stage_position_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stagestate',
+            constraint=models.UniqueConstraint(fields=('session', 'channel'), name='stage_session_channel_uniq'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:50
+
+from collections import Counter
+
+from django.db import migrations, models
+
+STAGE_POSITION_STEP = 1024
+
+
+def space_out_stage_positions(apps, schema_editor):
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    Graduate.objects.filter(stage_position__isnull=False).update(
+        stage_position=models.F('stage_position') * STAGE_POSITION_STEP
+    )
+
+
+def close_up_stage_positions(apps, schema_editor):
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    ready = list(
+        Graduate.objects.filter(stage_position__isnull=False)
+        .order_by('session', 'stage_channel', 'stage_position')
+        .only('pk', 'session', 'stage_channel')
+    )
+    positions = Counter()
+    for graduate in ready:
+        positions[graduate.session_id, graduate.stage_channel] += 1
+        graduate.stage_position = positions[graduate.session_id, graduate.stage_channel]
+    Graduate.objects.bulk_update(ready, ['stage_position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0019_stage_channels'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='graduate',
+            name='stage_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Sort key in its stage channel's running order, spaced out (empty = not ready for stage)", null=True),
+        ),
+        migrations.RunPython(space_out_stage_positions, close_up_stage_positions),
+    ]
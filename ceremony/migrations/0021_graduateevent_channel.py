@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:14
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_channel(apps, schema_editor):
+    # Older events only know the graduate's channel now, the best guess left
+    Graduate = apps.get_model('ceremony', 'Graduate')
+    GraduateEvent = apps.get_model('ceremony', 'GraduateEvent')
+    GraduateEvent.objects.filter(kind='stage_shown', graduate__isnull=False).update(
+        channel=Subquery(Graduate.objects.filter(pk=OuterRef('graduate_id')).values('stage_channel')[:1])
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ceremony', '0020_stage_position_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graduateevent',
+            name='channel',
+            field=models.SlugField(blank=True, db_index=False, max_length=30),
+        ),
+        migrations.RunPython(backfill_channel, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,167 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
 from django.utils import timezone 
-from ceremony.utils import process_photo
-from PIL import Image
+from collections import Counter
+from ceremony.stage import (
+    STAGE_DEFAULT_CHANNEL,
+    STAGE_PAYLOAD_TIMEOUT,
+    broadcaster,
+    stage_payload,
+    stage_payload_key,
+    stage_version_key,
+)
+from ceremony.photos import delete_unreferenced, enqueue_photo
+from ceremony.utils import normalize_search
+import copy
 import os
 from django.templatetags.static import static
 
 
 
+def prefix_q(field, prefix):
+    """Index-friendly `startswith`: a range scan instead of LIKE."""
+    return models.Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
+
+class GraduateQuerySet(models.QuerySet):
+    def scanned(self, code):
+        """Exact match on any ID printed on a student card or booking QR."""
+        code = code.strip()
+        return self.filter(
+            models.Q(unique_id=code) | models.Q(student_id=code) | models.Q(submission_id=code)
+        )
+
+    def search(self, query):
+        """
+        Desk search: prefix match on the folded full name or surname, or on
+        Student ID / Unique ID as typed. Every branch is an index range scan.
+        """
+        term = normalize_search(query)
+        if not term:
+            return self.none()
+        raw = query.strip()
+        return self.filter(
+            prefix_q('search_name', term)
+            | prefix_q('search_surname', term)
+            | prefix_q('student_id', raw)
+            | prefix_q('unique_id', raw)
+        ).order_by('search_name')
+
+    def hire_outstanding(self):
+        """Hired gowns that were handed out and have not come back."""
+        return self.filter(
+            gown_type=GownType.HIRE, gown_collected=True, gown_returned=False
+        )
+
+
+class PhotoStatus(models.TextChoices):
+    NONE = '', 'No photo'
+    PENDING = 'pending', 'Processing'
+    READY = 'ready', 'Ready'
+    # Processing failed; the original upload is left untouched and shown as is
+    FAILED = 'failed', 'Could not process'
+
+
+class GownType(models.TextChoices):
+    NONE = '', 'Not chosen'
+    HIRE = 'hire', 'Hire'
+    PURCHASE = 'purchase', 'Purchase'
+    OTHER = 'other', 'Other'
+
+    @classmethod
+    def from_option(cls, gown_option):
+        """Normalise the free-text booking answer, e.g. 'Hire ($200)'."""
+        option = (gown_option or '').lower()
+        if 'hire' in option:
+            return cls.HIRE
+        if 'purchase' in option:
+            return cls.PURCHASE
+        return cls.OTHER if option.strip() else cls.NONE
+
+
+class Ceremony(models.Model):
+    """A graduation event, e.g. "Autumn 2026", run as one or more sessions."""
+    name = models.CharField(max_length=200)
+    date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date', '-pk']
+
+    def __str__(self):
+        return self.name
+
+
+class Session(models.Model):
+    """
+    One sitting of a ceremony (e.g. a faculty's), with its own graduates,
+    stage, running order and dashboard. Sessions run side by side in
+    separate halls; past ones are archived rather than deleted.
+    """
+    ceremony = models.ForeignKey(Ceremony, on_delete=models.PROTECT, related_name='sessions')
+    name = models.CharField(max_length=200)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    archived = models.BooleanField(
+        default=False,
+        help_text='Past session: kept for the records, no longer offered to the desks',
+    )
+
+    # request.session key holding the session a user works in
+    REQUEST_KEY = 'ceremony_session'
+
+    class Meta:
+        ordering = ['-ceremony__date', 'starts_at', 'pk']
+
+    def __str__(self):
+        return f'{self.ceremony.name} – {self.name}'
+
+    @classmethod
+    def get_default(cls):
+        """The newest open session, created on first use (like StageState)."""
+        session = cls.objects.select_related('ceremony').filter(archived=False).order_by('-pk').first()
+        if session is None:
+            ceremony, _ = Ceremony.objects.get_or_create(name='Graduation')
+            session = cls.objects.create(ceremony=ceremony, name='Main session')
+        return session
+
+    @classmethod
+    def lookup(cls, value):
+        """A session by id or exact name, e.g. for --session options."""
+        sessions = cls.objects.select_related('ceremony')
+        return sessions.get(pk=value) if str(value).isdigit() else sessions.get(name=value)
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        The session a request works in: ?session=<id> (stage displays, which
+        are opened per hall), else the one the user picked, else the default.
+        """
+        if not hasattr(request, '_ceremony_session'):
+            pk = request.GET.get('session')
+            session = None
+            if pk and pk.isdigit():
+                session = cls.objects.select_related('ceremony').filter(pk=pk).first()
+            request._ceremony_session = session or cls.picked(request)
+        return request._ceremony_session
+
+    @classmethod
+    def picked(cls, request):
+        """The session the user picked, else the default; ignores ?session=."""
+        pk = request.session.get(cls.REQUEST_KEY)
+        session = None
+        if pk and str(pk).isdigit():
+            session = cls.objects.select_related('ceremony').filter(pk=pk).first()
+        return session or cls.get_default()
+
+
 class Graduate(models.Model):
+    # Every graduate belongs to one ceremony session; queries filter on it first
+    session = models.ForeignKey(Session, on_delete=models.PROTECT, related_name='graduates')
+
     # Original / imported columns
     submission_date = models.DateTimeField(null=True, blank=True)
     name = models.CharField(max_length=255)
@@ -20,12 +174,31 @@ class Graduate(models.Model):
         blank=True,
         help_text='Hire or Purchase from form',
     )
+    # Derived from gown_option (see refresh_derived_fields); indexed via Meta.indexes
+    gown_type = models.CharField(
+        max_length=10,
+        choices=GownType.choices,
+        default=GownType.NONE,
+        blank=True,
+        editable=False,
+    )
     additional_guests = models.PositiveIntegerField(default=0)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    unique_id = models.CharField(max_length=50, unique=True)
+    # Unique per session (see Meta.constraints)
+    unique_id = models.CharField(max_length=50)
     gown_size = models.CharField(max_length=20, blank=True)
     submission_id = models.CharField(max_length=50, blank=True)
     photo = models.ImageField(upload_to='photos/', null=True, blank=True)
+    photo_status = models.CharField(
+        max_length=10,
+        choices=PhotoStatus.choices,
+        default=PhotoStatus.NONE,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    # Size name → storage name of the processed, content-addressed copies
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     # Event-control fields
     attended = models.BooleanField(default=False)
@@ -41,6 +214,18 @@ class Graduate(models.Model):
     presentation_order = models.PositiveIntegerField(
         null=True, blank=True, help_text='Order for stage presentation'
     )
+    stage_position = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Sort key in its stage channel\'s running order, spaced out (empty = not ready for stage)',
+    )
+    stage_channel = models.SlugField(
+        max_length=30,
+        default=STAGE_DEFAULT_CHANNEL,
+        db_index=False,
+        help_text='Stage (StageState channel) this graduate crosses, e.g. "main" or "stage-2"',
+    )
 
     display_name = models.CharField(
         max_length=255,
@@ -53,8 +238,60 @@ class Graduate(models.Model):
         help_text='Optional – course/qualification to display',
     )
 
+    # Derived search keys (see refresh_derived_fields)
+    search_name = models.CharField(max_length=255, blank=True, editable=False)
+    search_surname = models.CharField(max_length=255, blank=True, editable=False)
+
+    # Fingerprint of the last imported CSV row, lets re-imports skip unchanged rows
+    import_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # ChangeSequence('roster') value of the last change to a ROSTER_FIELDS column
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = GraduateQuerySet.as_manager()
+
+    # Filled by refresh_derived_fields() from imported columns
+    DERIVED_FIELDS = ['display_name', 'search_name', 'search_surname', 'gown_type']
+    # Compared with the stored row on save (dashboard counters, running order)
+    STATE_FIELDS = [
+        'session', 'unique_id', 'qualification', 'gown_type',
+        'attended', 'gown_collected', 'gown_returned', 'stage_channel', 'stage_position',
+    ]
+    # What the desks see and change; refreshed after every transition()
+    DESK_FIELDS = STATE_FIELDS + ['display_name', 'student_id', 'check_in_time', 'checked_in_by']
+    # Columns of the offline desk roster, in order (see views.desk_roster)
+    ROSTER_FIELDS = [
+        'id', 'display_name', 'student_id', 'unique_id', 'submission_id', 'email',
+        'search_name', 'search_surname', 'attended', 'gown_collected', 'gown_returned',
+        'gown_type', 'gown_size',
+    ]
+    ROSTER_SEQUENCE = 'roster'
+    # Room left between neighbours in a running order (see sync_stage_position)
+    STAGE_POSITION_STEP = 1024
+
     class Meta:
         ordering = ['presentation_order', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'unique_id'], name='grad_session_uid_uniq'),
+        ]
+        # Every query runs within one session, so each index starts with it
+        indexes = [
+            # Desk search and scans (see GraduateQuerySet); the name index also
+            # serves keyset pagination of the grad_admin table (GRAD_ADMIN_SORTS)
+            models.Index(fields=['session', 'search_name', 'unique_id'], name='grad_name_uid_idx'),
+            models.Index(fields=['session', 'search_surname'], name='grad_surname_idx'),
+            models.Index(fields=['session', 'student_id'], name='grad_student_id_idx'),
+            models.Index(fields=['session', 'submission_id'], name='grad_submission_id_idx'),
+            models.Index(fields=['session', 'attended', 'unique_id'], name='grad_attended_uid_idx'),
+            models.Index(fields=['session', 'gown_collected', 'unique_id'], name='grad_gown_uid_idx'),
+            # Gown desk lookups, e.g. GraduateQuerySet.hire_outstanding()
+            models.Index(
+                fields=['session', 'gown_type', 'gown_collected', 'gown_returned', 'unique_id'],
+                name='grad_gown_type_idx',
+            ),
+            models.Index(fields=['session', 'stage_channel', 'stage_position'], name='grad_stage_position_idx'),
+            # Roster deltas for the desks (see views.desk_roster)
+            models.Index(fields=['session', 'change_seq'], name='grad_change_seq_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.student_id})'
@@ -66,39 +303,277 @@ class Graduate(models.Model):
             self.checked_in_by = staff_initials
         self.save()
 
-    def get_photo_or_default(self):
-        if self.photo:
-            return self.photo.url
-        return static('ceremony/default_silhouette_grey.png')
+    def transition(self, expected, updates, source='', actor='', when=None):
+        """
+        Desk actions as one conditional UPDATE: write `updates` only if the
+        row still holds `expected`, so two desks acting at once can never
+        undo each other's work. `expected` must pin the previous value of
+        every flag being changed. Either way the instance is refreshed with
+        the stored desk state. Returns True only for the call that made the
+        change, which is also logged (see GraduateEvent) as done by `actor`
+        at the `source` desk.
+        """
+        with transaction.atomic(savepoint=False):
+            changed = bool(Graduate.objects.filter(pk=self.pk, **expected).update(**updates))
+            self.refresh_from_db(fields=self.DESK_FIELDS)
+            if changed:
+                before = copy.copy(self)
+                for field, value in expected.items():
+                    setattr(before, field, value)
+                DashboardCounter.apply_change(before.counter_keys(), self.counter_keys())
+                GraduateEvent.record_changes(before, self, source, actor, when)
+
+                # Join or leave the stage queue if readiness changed
+                self.sync_stage_position(self.stage_position)
+                # Only real changes are numbered: a repeated scan leaves desks nothing to fetch
+                Graduate.objects.filter(pk=self.pk).update(
+                    stage_position=self.stage_position,
+                    change_seq=ChangeSequence.next(self.ROSTER_SEQUENCE),
+                )
+        return changed
+
+    def check_in(self, staff_initials=None, when=None, source='', actor=''):
+        """
+        Same result as mark_attended(), but race-free (see transition()) so
+        repeated scans from several desks are harmless. Returns True only
+        for the call that actually checked the graduate in. `when` is the
+        time of the scan for check-ins queued by an offline desk.
+        """
+        updates = {'attended': True, 'check_in_time': when or timezone.now()}
+        if staff_initials:
+            updates['checked_in_by'] = staff_initials
+        return self.transition({'attended': False}, updates, source, actor or staff_initials or '', when)
+
+    def undo_check_in(self, when=None, source='', actor=''):
+        updates = {'attended': False, 'check_in_time': None, 'checked_in_by': ''}
+        return self.transition({'attended': True}, updates, source, actor, when)
+
+    def collect_gown(self, when=None, source='', actor=''):
+        return self.transition({'gown_collected': False}, {'gown_collected': True}, source, actor, when)
+
+    def return_gown(self, when=None, source='', actor=''):
+        expected = {'gown_collected': True, 'gown_returned': False}
+        return self.transition(expected, {'gown_returned': True}, source, actor, when)
+
+    def counter_keys(self):
+        """Dashboard counters (see DashboardCounter) of its session this graduate adds 1 to."""
+        keys = ['total']
+        if self.attended:
+            keys.append('checked_in')
+        if self.gown_collected:
+            keys.append('gown_collected')
+        if self.gown_returned:
+            keys.append('gown_returned')
+        if self.needs_to_return_gown():
+            keys.append('gown_to_return')
+            if self.gown_collected and not self.gown_returned:
+                keys.append('gown_outstanding')
+        qualification = self.qualification or ''
+        keys += [
+            DashboardCounter.qualification_key(qualification, key)
+            for key in DashboardCounter.QUALIFICATION_COUNTERS
+            if key in keys
+        ]
+        return [DashboardCounter.session_key(self.session_id, key) for key in keys]
+
+    @property
+    def ready_for_stage(self):
+        return self.attended and self.gown_collected
+
+    def running_order(self, channel):
+        """The rest of a stage channel's running order, with the channel locked."""
+        # Serialise running-order edits between desks (no-op on SQLite)
+        StageState.objects.select_for_update().get_or_create(session_id=self.session_id, channel=channel)
+        return Graduate.objects.filter(
+            session_id=self.session_id, stage_channel=channel, stage_position__isnull=False
+        ).exclude(pk=self.pk)
+
+    def sync_stage_position(self, current_position, current_channel=None):
+        """
+        Keep each channel's running order (by unique_id) as this graduate
+        joins, leaves or moves between them. Positions are spaced out, so
+        joining takes a free number between the two neighbours and leaving
+        just frees one; other rows only move in the rare case that two
+        neighbours have no room left. `current_position` and
+        `current_channel` must come from the database.
+        """
+        self.stage_position = current_position
+        current_channel = current_channel or self.stage_channel
+        if self.ready_for_stage == (current_position is not None) and (
+            current_position is None or current_channel == self.stage_channel
+        ):
+            return
+
+        if current_position is not None:
+            # Locked all the same, so a renumbering can't put this row back
+            self.running_order(current_channel)
+            self.stage_position = None
+
+        if self.ready_for_stage:
+            queue = self.running_order(self.stage_channel)
+            self.stage_position = self.free_stage_position(queue)
+            if self.stage_position is None:
+                self.respace_stage_positions(queue)
+                self.stage_position = self.free_stage_position(queue)
+
+    def free_stage_position(self, queue):
+        """A position between this graduate's neighbours in `queue`, or None if there is no room."""
+        # Everyone in a running order has been checked in
+        queue = queue.filter(attended=True).values_list('stage_position', flat=True)
+        before = queue.filter(unique_id__lt=self.unique_id).order_by('-unique_id').first() or 0
+        after = queue.filter(unique_id__gt=self.unique_id).order_by('unique_id').first()
+        if after is None:
+            return before + self.STAGE_POSITION_STEP
+        return (before + after) // 2 if after - before > 1 else None
+
+    @classmethod
+    def respace_stage_positions(cls, queue):
+        """Spread a running order out again to STAGE_POSITION_STEP apart."""
+        graduates = list(queue.order_by('stage_position').only('pk', 'stage_position'))
+        for place, graduate in enumerate(graduates, start=1):
+            graduate.stage_position = place * cls.STAGE_POSITION_STEP
+        cls.objects.bulk_update(graduates, ['stage_position'], batch_size=500)
+
+    @classmethod
+    def rebuild_stage_positions(cls):
+        """Recompute every stage channel's running order, e.g. after bulk edits."""
+        with transaction.atomic():
+            cls.objects.filter(stage_position__isnull=False).update(stage_position=None)
+            ready = list(
+                cls.objects.filter(attended=True, gown_collected=True)
+                .order_by('session', 'stage_channel', 'unique_id')
+                .only('pk', 'session', 'stage_channel')
+            )
+            positions = Counter()
+            for graduate in ready:
+                channel = (graduate.session_id, graduate.stage_channel)
+                positions[channel] += cls.STAGE_POSITION_STEP
+                graduate.stage_position = positions[channel]
+            cls.objects.bulk_update(ready, ['stage_position'], batch_size=500)
+
+    @property
+    def photo_ready(self):
+        """False while a new upload is still being processed in the background."""
+        return bool(self.photo) and self.photo_status in (PhotoStatus.READY, PhotoStatus.FAILED)
+
+    def get_photo_url(self, size='stage'):
+        """
+        URL of the processed rendition in `size` (see PHOTO_RENDITIONS), or
+        None while there is nothing presentable yet. Photos that could not
+        be processed fall back to the original upload.
+        """
+        if not self.photo_ready:
+            return None
+        # WebP copies are optional; fall back to the JPEG of the same size
+        name = self.photo_renditions.get(size) or self.photo_renditions.get(size.removesuffix('_webp'))
+        if name:
+            return default_storage.url(name)
+        # Failed, or processed before renditions existed
+        return self.photo.url
+
+    def get_photo_or_default(self, size='stage'):
+        return self.get_photo_url(size) or static('ceremony/default_silhouette_grey.png')
+
+    @property
+    def thumbnail_url(self):
+        return self.get_photo_or_default('thumb')
+
+    @property
+    def desk_photo_url(self):
+        return self.get_photo_url('desk')
     
     def needs_to_return_gown(self):
         """
         Graduates who PURCHASED a gown do NOT return it.
         Graduates who HIRED a gown MUST return it.
         """
-        if not self.gown_option:
-            return False
-
-        return "hire" in self.gown_option.lower()  # safe match for: Hire ($200)
+        return self.gown_type == GownType.HIRE
 
     
-    def save(self, *args, **kwargs):
-        # 1) Ensure display_name is set
+    def refresh_derived_fields(self):
+        """Fill columns computed from imported data. Bulk writers must call this."""
         if not self.display_name:
             self.display_name = self.name
+        self.search_name = normalize_search(self.name)
+        self.search_surname = self.search_name.rsplit(' ', 1)[-1]
+        self.gown_type = GownType.from_option(self.gown_option)
+
+    def save(self, *args, **kwargs):
+        # 1) Ensure display_name, search keys and gown type are set
+        self.refresh_derived_fields()
+        if self.session_id is None:
+            self.session = Session.get_default()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & {'name', 'display_name', 'gown_option'}:
+                update_fields |= set(self.DERIVED_FIELDS)
+        saving_photo = update_fields is None or 'photo' in update_fields
+
+        with transaction.atomic(savepoint=False):
+            # 2) Lock the stored row and read what this save compares against.
+            # The photo columns are only needed when the photo is being saved.
+            old = None
+            if self.pk:
+                fields = self.STATE_FIELDS + (['photo', 'photo_renditions'] if saving_photo else [])
+                # Locked so concurrent saves apply their counter changes in turn
+                old = Graduate.objects.select_for_update().only(*fields).filter(pk=self.pk).first()
 
-        # 2) Capture old photo path (if any) BEFORE saving
-        old_photo_path = None
-        if self.pk:
-            try:
-                old = Graduate.objects.get(pk=self.pk)
-                if old.photo:
+            # The state after this save: with update_fields, unsaved edits to
+            # other fields must not move the counters or the running order
+            if update_fields is None or old is None:
+                state = self
+            else:
+                state = copy.copy(old)
+                for field in update_fields:
+                    setattr(state, field, getattr(self, field))
+                if update_fields & {'attended', 'gown_collected', 'stage_channel'}:
+                    update_fields.add('stage_position')
+            state.sync_stage_position(old.stage_position if old else None, old.stage_channel if old else None)
+            self.stage_position = state.stage_position
+
+            # A new upload is processed in the background (see ceremony.photos)
+            old_photo_name = ''
+            old_photo_path = None
+            old_renditions = {}
+            photo_changed = False
+            if saving_photo:
+                if old and old.photo:
+                    old_photo_name = old.photo.name
                     old_photo_path = old.photo.path
-            except Graduate.DoesNotExist:
-                pass
+                old_renditions = old.photo_renditions if old else {}
+                photo_changed = not self.photo or self.photo.name != old_photo_name
+                if photo_changed:
+                    self.photo_renditions = {}
+                    self.photo_status = PhotoStatus.PENDING if self.photo else PhotoStatus.NONE
+                    if update_fields is not None:
+                        update_fields |= {'photo_renditions', 'photo_status'}
+
+            # Desks pick this row up on their next roster sync
+            if update_fields is None or update_fields & set(self.ROSTER_FIELDS):
+                self.change_seq = ChangeSequence.next(self.ROSTER_SEQUENCE)
+                if update_fields is not None:
+                    update_fields.add('change_seq')
+
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields
 
-        # 3) First save – this writes the NEW upload to disk
-        super().save(*args, **kwargs)
+            # 3) First save – this writes the NEW upload to disk
+            super().save(*args, **kwargs)
+            DashboardCounter.apply_change(old.counter_keys() if old else [], state.counter_keys())
+            if old:
+                GraduateEvent.record_changes(old, state)
+
+        # Whoever is on screen must not keep showing a stale name/photo
+        StageState.republish_if_showing(self.session_id, {self.pk})
+
+        if not saving_photo:
+            return
+
+        if photo_changed and old_renditions:
+            stale = list(old_renditions.values())
+            transaction.on_commit(lambda: delete_unreferenced(stale))
 
         # 4) If there is no current photo
         if not self.photo:
@@ -116,23 +591,9 @@ class Graduate(models.Model):
             # same file name, already processed earlier
             return
 
-        # 6) Process the *current* photo and overwrite original bytes
-        try:
-            processed = process_photo(current_photo_path)
-        except Exception:
-            return
-
-        if processed:
-            try:
-                processed.seek(0)
-            except Exception:
-                pass
-            try:
-                with open(current_photo_path, "wb") as f:
-                    f.write(processed.read())
-            except Exception:
-                # If writing fails, don't break the app
-                return
+        # 6) Queue the *current* photo for its renditions once it is committed
+        pk = self.pk
+        transaction.on_commit(lambda: enqueue_photo(pk))
 
         # 7) If there was a different old photo file, delete it
         if old_photo_path and old_photo_path != current_photo_path:
@@ -144,7 +605,13 @@ class Graduate(models.Model):
 
 
 class StageState(models.Model):
-    """Simple singleton model to track which graduate is currently on stage."""
+    """
+    Which graduate is on stage: one row per stage channel of a session.
+    Channels (e.g. two stages, or an overflow hall) each have their own
+    running order, control panel and displays.
+    """
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='stage_channels')
+    channel = models.SlugField(max_length=30, default=STAGE_DEFAULT_CHANNEL, db_index=False)
     current_graduate = models.ForeignKey(
         Graduate,
         null=True,
@@ -152,11 +619,329 @@ class StageState(models.Model):
         on_delete=models.SET_NULL,
         related_name='current_stage_state',
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text='Bumped on every change so displays can skip unchanged polls',
+    )
+
+    class Meta:
+        ordering = ['session', 'channel']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'channel'], name='stage_session_channel_uniq'),
+        ]
 
     def __str__(self):
-        return 'Stage State'
+        return f'Stage State ({self.session_id}/{self.channel})'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+        else:
+            # Bump in the database so concurrent control tabs never reuse a version
+            self.version = models.F('version') + 1
+            super().save(*args, **kwargs)
+            self.refresh_from_db(fields=['version'])
+
+        # Refresh the cache and push to the channel's displays once the write is visible
+        payload = stage_payload(self)
+        session_id, channel = self.session_id, self.channel
+
+        def on_commit():
+            self.cache_payload(session_id, channel, payload)
+            broadcaster.publish(session_id, channel, payload)
+
+        transaction.on_commit(on_commit)
 
     @classmethod
-    def get_solo(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
+    def for_channel(cls, session_id, channel=STAGE_DEFAULT_CHANNEL):
+        obj, _ = cls.objects.get_or_create(session_id=session_id, channel=channel)
         return obj
+
+    @classmethod
+    def republish_if_showing(cls, session_id, pks):
+        """
+        Re-send any of the session's stages showing one of `pks`, e.g. after a
+        rename. Saving bumps the version, which is what displays redraw on.
+        """
+        for state in cls.objects.filter(session_id=session_id, current_graduate__in=pks):
+            state.save()
+
+    @staticmethod
+    def cache_payload(session_id, channel, payload):
+        version = payload['version']
+        cache.set(stage_payload_key(session_id, channel, version), payload, STAGE_PAYLOAD_TIMEOUT)
+        cache.set(stage_version_key(session_id, channel), version, settings.STAGE_CACHE_TIMEOUT)
+
+    @classmethod
+    def get_version(cls, session_id, channel):
+        """Current version of a stage channel, from the cache when possible."""
+        key = stage_version_key(session_id, channel)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.filter(session_id=session_id, channel=channel).values_list(
+                'version', flat=True
+            ).first() or 0
+            cache.set(key, version, settings.STAGE_CACHE_TIMEOUT)
+        return version
+
+    @classmethod
+    def get_payload(cls, session_id, channel):
+        """
+        Display payload for the graduate on a stage channel, from the cache
+        when possible.
+
+        Payloads are keyed by version, so any process that sees a newer
+        version in the cache never serves an older payload.
+        """
+        version = cache.get(stage_version_key(session_id, channel))
+        if version is not None:
+            payload = cache.get(stage_payload_key(session_id, channel, version))
+            if payload is not None:
+                return payload
+
+        state = cls.objects.select_related('current_graduate').filter(
+            session_id=session_id, channel=channel
+        ).first()
+        # No row yet (or no such session or channel): nobody on screen
+        payload = stage_payload(state) if state else {'id': None, 'version': 0}
+        cls.cache_payload(session_id, channel, payload)
+        return payload
+
+    @classmethod
+    async def aget_version(cls, session_id, channel):
+        return await sync_to_async(cls.get_version)(session_id, channel)
+
+    @classmethod
+    async def aget_payload(cls, session_id, channel):
+        return await sync_to_async(cls.get_payload)(session_id, channel)
+
+
+class DashboardCounter(models.Model):
+    """
+    Running totals behind the grad_admin dashboard, so it never has to
+    aggregate over every graduate. Every write path applies the change it
+    makes (see Graduate.counter_keys) in the same transaction;
+    `rebuild()` recounts from scratch after edits made outside the app.
+    Keys start with the session id ("<session>:checked_in").
+    """
+    # Global counters, in dashboard order
+    COUNTERS = (
+        'total',
+        'checked_in',
+        'gown_collected',
+        'gown_returned',
+        'gown_to_return',
+        'gown_outstanding',
+    )
+    # Also kept per qualification
+    QUALIFICATION_COUNTERS = ('total', 'checked_in', 'gown_collected')
+
+    key = models.CharField(max_length=150, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.key} = {self.value}'
+
+    @staticmethod
+    def session_key(session_id, key):
+        return f'{session_id}:{key}'
+
+    @staticmethod
+    def qualification_key(qualification, counter):
+        return f'qualification:{counter}:{qualification}'
+
+    @classmethod
+    def apply_change(cls, old_keys, new_keys):
+        """Move counters from a graduate's old state to its new one."""
+        delta = Counter(new_keys)
+        delta.subtract(old_keys)
+        cls.apply(delta)
+
+    @classmethod
+    def apply(cls, delta):
+        """Add `delta` (key → amount) to the stored counters, in one UPDATE."""
+        delta = {key: amount for key, amount in delta.items() if amount}
+        if not delta:
+            return
+
+        def add(sign):
+            return cls.objects.filter(key__in=list(delta)).update(value=models.F('value') + models.Case(
+                *[models.When(key=key, then=models.Value(sign * amount)) for key, amount in delta.items()],
+                default=models.Value(0),
+            ))
+
+        with transaction.atomic(savepoint=False):
+            # Row locks in key order: the UPDATE alone locks rows in scan order,
+            # which lets two desks deadlock on PostgreSQL
+            list(cls.objects.select_for_update().filter(key__in=list(delta)).order_by('key').values_list('pk'))
+            if add(1) < len(delta):
+                # Some counter doesn't exist yet (e.g. a new qualification):
+                # take the partial update back, create the missing rows, redo
+                add(-1)
+                cls.objects.bulk_create([cls(key=key) for key in delta], ignore_conflicts=True)
+                add(1)
+
+    @classmethod
+    def rebuild(cls):
+        """Recount everything from the Graduate table."""
+        totals = Counter()
+        for graduate in Graduate.objects.only(
+            'session', 'qualification', 'gown_type', 'attended', 'gown_collected', 'gown_returned'
+        ).iterator():
+            totals.update(graduate.counter_keys())
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cls(key=key, value=value) for key, value in totals.items())
+        return totals
+
+    @classmethod
+    def summary(cls, session_id):
+        """A session's counters in one small query, shaped for the dashboard and stats API."""
+        session_prefix = cls.session_key(session_id, '')
+        values = {
+            key[len(session_prefix):]: value
+            for key, value in cls.objects.filter(key__startswith=session_prefix).values_list('key', 'value')
+        }
+        stats = {key: values.get(key, 0) for key in cls.COUNTERS}
+
+        qualifications = {}
+        prefix = 'qualification:'
+        for key, value in values.items():
+            if not key.startswith(prefix):
+                continue
+            counter, qualification = key[len(prefix):].split(':', 1)
+            qualifications.setdefault(qualification, dict.fromkeys(cls.QUALIFICATION_COUNTERS, 0))
+            qualifications[qualification][counter] = value
+        stats['qualifications'] = [
+            {'name': name, **counts}
+            for name, counts in sorted(qualifications.items())
+            if counts['total']
+        ]
+        return stats
+
+
+class ChangeSequence(models.Model):
+    """
+    Named, ever-increasing numbers for "what changed since N?" syncing.
+    Taking the next value locks the row until commit, so numbers become
+    visible in order: a client that has seen N can safely ask for
+    everything after N.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name} = {self.value}'
+
+    @classmethod
+    def next(cls, name):
+        with transaction.atomic(savepoint=False):
+            sequence = cls.objects.filter(name=name)
+            if not sequence.update(value=models.F('value') + 1):
+                cls.objects.get_or_create(name=name)
+                sequence.update(value=models.F('value') + 1)
+            return sequence.values_list('value', flat=True).get()
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def mark(cls, name, value):
+        cls.objects.update_or_create(name=name, defaults={'value': value})
+
+
+class EventKind(models.TextChoices):
+    CHECK_IN = 'check_in', 'Checked in'
+    UNDO_CHECK_IN = 'undo_check_in', 'Check-in undone'
+    GOWN_COLLECTED = 'gown_collected', 'Gown collected'
+    UNDO_GOWN_COLLECTED = 'undo_gown_collected', 'Gown collection undone'
+    GOWN_RETURNED = 'gown_returned', 'Gown returned'
+    UNDO_GOWN_RETURNED = 'undo_gown_returned', 'Gown return undone'
+    STAGE_SHOWN = 'stage_shown', 'Shown on stage'
+
+
+class EventSource(models.TextChoices):
+    OTHER = '', 'Other'
+    CHECK_IN_DESK = 'check_in', 'Check-in desk'
+    GOWN_DESK = 'gown', 'Gown desk'
+    ADMIN = 'admin', 'Grad admin'
+    STAGE = 'stage', 'Stage control'
+
+
+class GraduateEvent(models.Model):
+    """
+    Append-only history of desk and stage actions, written in the same
+    transaction as the change itself. Throughput figures (see
+    views.throughput_api) come from here rather than the Graduate table.
+    """
+    # Desk flag → event when it is set, event when it is cleared
+    FLAG_EVENTS = {
+        'attended': (EventKind.CHECK_IN, EventKind.UNDO_CHECK_IN),
+        'gown_collected': (EventKind.GOWN_COLLECTED, EventKind.UNDO_GOWN_COLLECTED),
+        'gown_returned': (EventKind.GOWN_RETURNED, EventKind.UNDO_GOWN_RETURNED),
+    }
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='events')
+    # Kept when the graduate is deleted, so past throughput doesn't change
+    graduate = models.ForeignKey(
+        Graduate,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='events',
+    )
+    kind = models.CharField(max_length=20, choices=EventKind.choices)
+    source = models.CharField(max_length=10, choices=EventSource.choices, blank=True)
+    # StageState channel a STAGE_SHOWN was on; the graduate may be moved later
+    channel = models.SlugField(max_length=30, blank=True, db_index=False)
+    # Staff initials typed at the desk, else the username
+    actor = models.CharField(max_length=100, blank=True)
+    time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-time']
+        indexes = [
+            models.Index(fields=['session', 'time', 'kind'], name='event_time_idx'),
+            models.Index(fields=['graduate', 'time'], name='event_graduate_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} – {self.graduate_id} at {self.time:%H:%M:%S}'
+
+    @classmethod
+    def record_changes(cls, before, after, source='', actor='', when=None):
+        """Log the desk flags that differ between two states of one graduate."""
+        events = [
+            cls(
+                session_id=after.session_id,
+                graduate_id=after.pk,
+                kind=set_kind if getattr(after, flag) else cleared_kind,
+                source=source,
+                actor=actor[:100],
+                time=when or timezone.now(),
+            )
+            for flag, (set_kind, cleared_kind) in cls.FLAG_EVENTS.items()
+            if getattr(before, flag) != getattr(after, flag)
+        ]
+        if events:
+            cls.objects.bulk_create(events)
+
+
+@receiver(pre_delete, sender=Graduate)
+def graduate_deleting(sender, instance, **kwargs):
+    # SET_NULL would clear a stage showing this graduate with a plain UPDATE:
+    # no new version, so displays would keep the deleted name and photo
+    for state in StageState.objects.filter(current_graduate=instance):
+        state.current_graduate = None
+        state.save()
+
+
+@receiver(post_delete, sender=Graduate)
+def graduate_deleted(sender, instance, **kwargs):
+    # Also runs for queryset/admin bulk deletes, one call per graduate
+    DashboardCounter.apply_change(instance.counter_keys(), [])
+
+    # Deltas can't express a removed row: desks behind this point reload in full
+    seq = ChangeSequence.next(Graduate.ROSTER_SEQUENCE)
+    ChangeSequence.mark(f'{Graduate.ROSTER_SEQUENCE}:deleted', seq)
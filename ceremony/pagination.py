@@ -0,0 +1,54 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Sort values of the last row seen, or None for a missing/garbled cursor."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def after_q(ordering, values):
+    """
+    Rows strictly after `values` in `ordering` (model field names, '-' for
+    descending). The ordering must end in a unique field.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor, size):
+    """
+    One page of `queryset` in `ordering`, starting after `cursor`. Unlike
+    OFFSET, every page is an index range scan however deep it is. Returns
+    the rows and the cursor for the next page (None on the last page).
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(ordering):
+        queryset = queryset.filter(after_q(ordering, values))
+
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
@@ -0,0 +1,140 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+
+from ceremony.utils import build_renditions, content_name
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PHOTO_WORKERS,
+                thread_name_prefix='photo',
+            )
+        return _executor
+
+
+def enqueue_photo(pk):
+    """
+    Hand a freshly uploaded photo to the background pool. With
+    PHOTO_WORKERS = 0 it simply stays pending until
+    `manage.py process_photos` picks it up.
+    """
+    if settings.PHOTO_WORKERS:
+        get_executor().submit(_run, pk)
+
+
+def _run(pk):
+    try:
+        process_pending_photo(pk)
+    except Exception:
+        logger.exception('Photo processing failed for graduate %s', pk)
+    finally:
+        # Pool threads outlive requests, so give the connection back
+        connection.close()
+
+
+def save_renditions(renditions):
+    """Store built renditions under content-hash names; returns {size: name}."""
+    names = {}
+    for size, (content, extension) in renditions.items():
+        name = content_name(content, extension)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        names[size] = name
+    return names
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            pass
+
+
+def delete_unreferenced(names):
+    """
+    Delete rendition files no graduate points at any more. Names are content
+    hashes, so graduates with byte-identical photos share the same files.
+    """
+    from ceremony.models import Graduate
+
+    names = set(names)
+    checked = list(names)
+    graduates = Graduate.objects.annotate(renditions_text=Cast('photo_renditions', TextField()))
+    for start in range(0, len(checked), 200):
+        # Narrow down in the database, then compare the actual values
+        query = Q()
+        for name in checked[start:start + 200]:
+            query |= Q(renditions_text__contains=name)
+        for renditions in graduates.filter(query).values_list('photo_renditions', flat=True):
+            names -= set(renditions.values())
+    delete_files(names)
+
+
+def process_pending_photo(pk):
+    """Build the renditions of one pending photo and mark it ready (or failed)."""
+    from ceremony.models import PhotoStatus
+
+    render_photo(pk, [PhotoStatus.PENDING])
+
+
+def rerender_photo(pk):
+    """
+    Build fresh renditions of an already processed photo, e.g. after
+    changing PHOTO_RENDITIONS. The current ones stay in use until the new
+    files are stored, and are kept if the photo can't be processed.
+    """
+    from ceremony.models import PhotoStatus
+
+    render_photo(pk, [PhotoStatus.READY, PhotoStatus.FAILED])
+
+
+def render_photo(pk, statuses):
+    """Renditions for graduate `pk`'s photo, if its photo_status is one of `statuses`."""
+    from ceremony.models import Graduate, PhotoStatus, StageState
+
+    graduate = Graduate.objects.filter(pk=pk, photo_status__in=statuses).first()
+    if graduate is None or not graduate.photo:
+        return
+    status = graduate.photo_status
+
+    path = graduate.photo.path
+    try:
+        renditions = save_renditions(build_renditions(path, webp=settings.PHOTO_WEBP))
+        new_status = PhotoStatus.READY
+    except Exception:
+        logger.exception('Could not process photo %s', path)
+        if status != PhotoStatus.PENDING:
+            return
+        renditions = {}
+        new_status = PhotoStatus.FAILED
+
+    # Only if nobody uploaded a newer photo in the meantime
+    updated = Graduate.objects.filter(
+        pk=pk, photo=graduate.photo.name, photo_status=status
+    ).update(photo_status=new_status, photo_renditions=renditions)
+    if not updated:
+        delete_unreferenced(renditions.values())
+        return
+
+    # Renditions of an earlier version of this photo, unless another graduate shares them
+    delete_unreferenced(set(graduate.photo_renditions.values()) - set(renditions.values()))
+
+    if renditions != graduate.photo_renditions:
+        StageState.republish_if_showing(graduate.session_id, {pk})
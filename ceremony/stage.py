@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.validators import slug_re
+
+from ceremony.utils import PHOTO_RENDITIONS
+
+
+def photo_sizes():
+    """Rendition names a display may ask for with ?size=."""
+    sizes = list(PHOTO_RENDITIONS)
+    if settings.PHOTO_WEBP:
+        sizes += [f"{size}_webp" for size in PHOTO_RENDITIONS]
+    return sizes
+
+
+# Payloads are immutable per version, so they can outlive the version key
+STAGE_PAYLOAD_TIMEOUT = 60 * 60
+
+
+# Stage channel used when none is named (see models.StageState)
+STAGE_DEFAULT_CHANNEL = "main"
+
+
+def stage_channel(value):
+    """A ?channel= value as a channel name, falling back to the default one."""
+    return value if value and slug_re.fullmatch(value) and len(value) <= 30 else STAGE_DEFAULT_CHANNEL
+
+
+# Each session runs one or more stage channels (see models.StageState), so
+# every cache key, ETag and broadcast is scoped to the session and channel:
+# NEXT on one channel never touches another channel's displays
+
+def stage_version_key(session_id, channel):
+    return f"stage:{session_id}:{channel}:version"
+
+
+def stage_payload_key(session_id, channel, version):
+    return f"stage:{session_id}:{channel}:payload:{version}"
+
+
+def stage_payload(state):
+    """JSON-ready description of whoever is on screen (id None = nobody)."""
+    graduate = state.current_graduate
+    if graduate is None:
+        return {"id": None, "version": state.version}
+
+    return {
+        "id": graduate.id,
+        "name": graduate.display_name,
+        "qualification": graduate.qualification,
+        # Silhouette on screen until a new upload has been processed
+        "photo": graduate.get_photo_url("stage"),
+        "photos": {size: graduate.get_photo_url(size) for size in photo_sizes()},
+        "version": state.version,
+    }
+
+
+def stage_etag(session_id, channel, version):
+    return f'"stage-{session_id}-{channel}-{version}"'
+
+
+def format_sse(payload, event="stage"):
+    """Encode a payload as a single Server-Sent Events message."""
+    return f"id: {payload['version']}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+class StageBroadcaster:
+    """
+    In-process fan-out of stage changes to the displays of each stage channel.
+
+    Publishers may be sync views running in a worker thread, subscribers are
+    async SSE streams, so every hand-off goes through the subscriber's own
+    event loop. Each subscriber only ever needs the latest state, so its
+    queue holds at most one pending payload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, session_id, channel):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+        entry = (loop, queue)
+        key = (session_id, channel)
+        with self._lock:
+            self._subscribers[key].add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers[key].discard(entry)
+                if not self._subscribers[key]:
+                    del self._subscribers[key]
+
+    def publish(self, session_id, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get((session_id, channel), ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, payload)
+            except RuntimeError:
+                # Loop already closed – the stream is going away anyway
+                pass
+
+    @staticmethod
+    def _offer(queue, payload):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(payload)
+
+
+broadcaster = StageBroadcaster()
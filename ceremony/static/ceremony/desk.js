@@ -0,0 +1,260 @@
+/*
+ * Offline-capable desks: a cached copy of the roster for searching and
+ * scanning, and a queue of desk actions sent in batches every few seconds
+ * (see views.desk_roster and views.desk_sync). Both live in localStorage,
+ * so a page reload or a Wi-Fi drop loses nothing. Desk machines are shared:
+ * storage is kept per user (and the roster per ceremony session), other
+ * copies of the roster are dropped, and logging out forgets them all
+ * (base.html).
+ */
+(function (window, $) {
+    "use strict";
+
+    const SYNC_INTERVAL_MS = 3000;
+    const ROSTER_REFRESH_MS = 15000;
+    const SYNC_BATCH_SIZE = 100;
+    const ROSTER_KEY = "gradpilot.desk.roster";
+    const QUEUE_KEY = "gradpilot.desk.queue";
+
+    // What each action does to a roster row, and how to tell it is done
+    const EFFECTS = {
+        "check-in": [s => { s.attended = true; }, s => s.attended],
+        "undo-check-in": [s => { s.attended = false; }, s => !s.attended],
+        "collect-gown": [s => { s.gown_collected = true; }, s => s.gown_collected],
+        "return-gown": [s => { s.gown_returned = true; }, s => s.gown_returned],
+    };
+
+    function load(key, fallback) {
+        try {
+            return JSON.parse(window.localStorage.getItem(key)) || fallback;
+        } catch (e) {
+            return fallback;
+        }
+    }
+
+    function save(key, value) {
+        try {
+            window.localStorage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            // Storage full or disabled: keep working from memory
+        }
+    }
+
+    // Same folding as ceremony.utils.normalize_search
+    function normalize(value) {
+        return (value || "").normalize("NFKD").replace(/[\u0300-\u036f]/g, "")
+            .toLowerCase().split(/\s+/).filter(Boolean).join(" ");
+    }
+
+    const Desk = {
+        roster: null,
+        students: [],
+        byId: {},
+        queue: [],
+        online: true,
+        syncing: false,
+
+        /*
+         * options: rosterUrl, syncUrl, csrfToken, user and session (ids the
+         * storage is kept under), $status (element showing the
+         * connection/queue state), onConflict(student, action, status).
+         */
+        init(options) {
+            this.options = options;
+            this.rosterKey = `${ROSTER_KEY}.${options.user}.${options.session}`;
+            this.queueKey = `${QUEUE_KEY}.${options.user}`;
+            Desk.forget(this.rosterKey);
+            this.queue = load(this.queueKey, []);
+            this.setRoster(load(this.rosterKey, null));
+            this.refreshRoster();
+            this.sync();
+
+            window.setInterval(() => this.sync(), SYNC_INTERVAL_MS);
+            window.setInterval(() => this.refreshRoster(), ROSTER_REFRESH_MS);
+            window.addEventListener("online", () => this.sync());
+            window.addEventListener("offline", () => this.setOnline(false));
+            return this;
+        },
+
+        get ready() {
+            return this.roster !== null;
+        },
+
+        setRoster(roster) {
+            this.roster = roster;
+            if (!roster) {
+                return;
+            }
+            this.students = roster.rows.map(row => {
+                const student = {};
+                roster.fields.forEach((field, i) => { student[field] = row[i]; });
+                return student;
+            });
+            this.byId = {};
+            this.students.forEach(s => { this.byId[s.id] = s; });
+            // Actions not yet synced still show as done on this desk
+            this.queue.forEach(item => this.applyLocally(item));
+        },
+
+        // Only graduates changed since our copy are sent (see views.desk_roster);
+        // a copy from another ceremony session is replaced in full
+        refreshRoster() {
+            const params = this.roster ? {since: this.roster.seq, session: this.roster.session} : {};
+            $.ajax({url: this.options.rosterUrl, dataType: "json", data: params})
+                .done(data => {
+                    if (data.full || !this.roster) {
+                        this.setRoster(data);
+                    } else if (data.rows.length || data.seq !== this.roster.seq) {
+                        this.setRoster(this.merge(data));
+                    }
+                    save(this.rosterKey, this.roster);
+                    this.setOnline(true);
+                })
+                .fail(() => this.setOnline(false));
+        },
+
+        merge(delta) {
+            const roster = this.roster;
+            const id = roster.fields.indexOf("id");
+            const index = {};
+            roster.rows.forEach((row, i) => { index[row[id]] = i; });
+            delta.rows.forEach(row => {
+                if (row[id] in index) {
+                    roster.rows[index[row[id]]] = row;
+                } else {
+                    roster.rows.push(row);
+                }
+            });
+            roster.seq = delta.seq;
+            return roster;
+        },
+
+        // Prefix search on name, surname, Student ID or Unique ID, like the server
+        search(term, limit) {
+            const folded = normalize(term);
+            const raw = term.trim();
+            if (!folded) {
+                return [];
+            }
+            return this.students
+                .filter(s => s.search_name.startsWith(folded) || s.search_surname.startsWith(folded)
+                    || s.student_id.startsWith(raw) || s.unique_id.startsWith(raw))
+                .sort((a, b) => a.search_name.localeCompare(b.search_name))
+                .slice(0, limit);
+        },
+
+        // Exact match on any ID printed on a card or booking QR
+        scanned(code) {
+            code = code.trim();
+            if (!code) {
+                return [];
+            }
+            return this.students.filter(s =>
+                s.unique_id === code || s.student_id === code || s.submission_id === code);
+        },
+
+        enqueue(action, student, staffInitials) {
+            const item = {
+                id: `${Date.now()}-${Math.random().toString(36).slice(2, 8)}`,
+                graduate: student.id,
+                action: action,
+                staff_initials: staffInitials || "",
+                at: new Date().toISOString(),
+            };
+            this.queue.push(item);
+            save(this.queueKey, this.queue);
+            this.applyLocally(item);
+            this.render();
+            this.sync();
+        },
+
+        applyLocally(item) {
+            const student = this.byId[item.graduate];
+            if (student && EFFECTS[item.action]) {
+                EFFECTS[item.action][0](student);
+            }
+        },
+
+        sync() {
+            if (this.syncing || !this.queue.length) {
+                this.render();
+                return;
+            }
+            this.syncing = true;
+            const batch = this.queue.slice(0, SYNC_BATCH_SIZE);
+
+            $.ajax({
+                url: this.options.syncUrl,
+                method: "POST",
+                contentType: "application/json",
+                dataType: "json",
+                headers: {"X-CSRFToken": this.options.csrfToken},
+                data: JSON.stringify({actions: batch}),
+            }).done(data => {
+                const sent = new Set(batch.map(item => item.id));
+                this.queue = this.queue.filter(item => !sent.has(item.id));
+                save(this.queueKey, this.queue);
+                data.results.forEach((result, i) => this.settle(batch[i], result));
+                this.setOnline(true);
+            }).fail(xhr => {
+                // Kept in the queue and retried; 4xx (e.g. logged out) needs staff attention
+                this.setOnline(xhr.status >= 400 && xhr.status < 500);
+            }).always(() => {
+                this.syncing = false;
+                this.render();
+            });
+        },
+
+        // Take the server's state of a graduate (views.desk_state) into the roster
+        update(graduate) {
+            const student = graduate && this.byId[graduate.id];
+            if (student) {
+                Object.assign(student, graduate);
+                this.queue.filter(queued => queued.graduate === graduate.id)
+                    .forEach(queued => this.applyLocally(queued));
+            }
+            return student;
+        },
+
+        settle(item, result) {
+            const student = this.update(result.graduate) || this.byId[item.graduate];
+            const done = student && EFFECTS[item.action] && EFFECTS[item.action][1](student);
+            if (result.status !== "done" && !done && this.options.onConflict) {
+                this.options.onConflict(student, item.action, result.status);
+            }
+        },
+
+        setOnline(online) {
+            this.online = online;
+            this.render();
+        },
+
+        render() {
+            const $status = this.options && this.options.$status;
+            if (!$status) {
+                return;
+            }
+            const queued = this.queue.length;
+            if (!this.online) {
+                $status.attr("class", "badge bg-danger").text(`Offline – ${queued} action(s) queued`);
+            } else if (queued) {
+                $status.attr("class", "badge bg-warning text-dark").text(`Syncing ${queued} action(s)…`);
+            } else {
+                $status.attr("class", "badge bg-success").text("Online");
+            }
+        },
+    };
+
+    // Drop cached rosters (names, emails) except `keep`, e.g. on logout
+    Desk.forget = function (keep) {
+        try {
+            Object.keys(window.localStorage)
+                .filter(key => key.startsWith(ROSTER_KEY) && key !== keep)
+                .forEach(key => window.localStorage.removeItem(key));
+        } catch (e) {
+            // Storage disabled: nothing was cached
+        }
+    };
+
+    window.Desk = Desk;
+})(window, jQuery);
@@ -2,12 +2,28 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    # Ceremony session the user works in
+    path('session/', views.select_session, name='select_session'),
+
     # Grad admin dashboard
     path('', views.grad_admin, name='grad_admin'),
     path('students/<int:pk>/', views.student_detail, name='student_detail'),
+    path('api/stats/', views.stats_api, name='stats_api'),
+    path('api/students/', views.students_api, name='students_api'),
+    path('api/throughput/', views.throughput_api, name='throughput_api'),
+    path('export/<slug:preset>/', views.export, name='export'),
+
+    # Desk typeahead
+    path('api/search/', views.search_api, name='search_api'),
+
+    # Race-free desk actions and offline desk support (JSON)
+    path('desk/<int:pk>/<slug:action>/', views.desk_action, name='desk_action'),
+    path('desk/roster/', views.desk_roster, name='desk_roster'),
+    path('desk/sync/', views.desk_sync, name='desk_sync'),
 
     # Check-in front-end
     path('check-in/', views.check_in_search, name='check_in_search'),
+    path('check-in/scan/', views.check_in_scan, name='check_in_scan'),
     path('check-in/<int:pk>/', views.check_in_detail, name='check_in_detail'),
 
     # Gown front-end
@@ -18,4 +34,10 @@ urlpatterns = [
     path('stage/control/', views.stage_control, name='stage_control'),
     path('stage/display/', views.stage_display, name='stage_display'),
     path("current-student-api/", views.current_student_api, name="current_student_api"),
+    path("stage/events/", views.stage_events, name="stage_events"),
+    path("stage/upcoming/", views.stage_upcoming_api, name="stage_upcoming_api"),
+
+    # Ops metrics (staff only, opt-in)
+    path('ops/metrics/', views.ops_metrics, name='ops_metrics'),
+    path('ops/metrics/prometheus/', views.prometheus_metrics, name='prometheus_metrics'),
 ]
@@ -1,17 +1,45 @@
+import hashlib
+import unicodedata
+
 from PIL import Image
 from django.core.files.base import ContentFile
+from django.db import connections
 from io import BytesIO
 
-def process_photo(image_path, size=(900, 1200)):
+
+def normalize_search(value):
     """
-    Auto-crop to center and resize to 3:4 portrait ratio.
-    size default = 900x1200 (high quality for big screen)
+    Fold text for prefix matching: strip accents, casefold and collapse
+    whitespace, so "  José  SMITH" is stored and searched as "jose smith".
     """
-    if not image_path:
-        return None
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.casefold().split())
+
+
+def analyze_database(using="default"):
+    """
+    Refresh SQLite's query planner statistics. Without them SQLite can't tell
+    that the session column is the least selective part of each Graduate
+    index, and plans desk searches and scans as a scan of the whole session.
+    PostgreSQL's autovacuum keeps its own statistics, so there it's a no-op.
+    """
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+# Rendition name → (width, height); all 3:4 portrait crops of the same upload
+PHOTO_RENDITIONS = {
+    "thumb": (150, 200),    # admin table, autocomplete
+    "desk": (360, 480),     # check-in / gown desk previews
+    "stage": (900, 1200),   # big screen
+}
 
-    img = Image.open(image_path).convert("RGB")
 
+def crop_to_ratio(img, size):
+    """Center-crop an image to the aspect ratio of `size`."""
     target_ratio = size[0] / size[1]
     img_ratio = img.width / img.height
 
@@ -30,11 +58,50 @@ def process_photo(image_path, size=(900, 1200)):
         left = 0
         right = img.width
 
-    img = img.crop((left, top, right, bottom))
-    img = img.resize(size, Image.LANCZOS)
+    return img.crop((left, top, right, bottom))
 
+
+def encode_image(img, format="JPEG"):
     buffer = BytesIO()
-    img.save(buffer, format="JPEG", quality=90)
-    buffer.seek(0)
+    if format == "WEBP":
+        img.save(buffer, format="WEBP", quality=85, method=4)
+    else:
+        img.save(buffer, format="JPEG", quality=90, optimize=True)
+    return buffer.getvalue()
+
+
+def process_photo(image_path, size=(900, 1200)):
+    """
+    Auto-crop to center and resize to 3:4 portrait ratio.
+    size default = 900x1200 (high quality for big screen)
+    """
+    if not image_path:
+        return None
+
+    img = Image.open(image_path).convert("RGB")
+    img = crop_to_ratio(img, size).resize(size, Image.LANCZOS)
+
+    return ContentFile(encode_image(img))
+
+
+def build_renditions(image_path, webp=False):
+    """
+    Decode and crop an upload once, then produce every size in
+    PHOTO_RENDITIONS. Returns {name: (bytes, extension)}; WebP copies, when
+    requested, are named "<size>_webp".
+    """
+    img = Image.open(image_path).convert("RGB")
+    img = crop_to_ratio(img, PHOTO_RENDITIONS["stage"])
+
+    renditions = {}
+    for name, size in PHOTO_RENDITIONS.items():
+        resized = img.resize(size, Image.LANCZOS)
+        renditions[name] = (encode_image(resized), "jpg")
+        if webp:
+            renditions[f"{name}_webp"] = (encode_image(resized, "WEBP"), "webp")
+    return renditions
+
 
-    return ContentFile(buffer.getvalue())
\ No newline at end of file
+def content_name(content, extension, prefix="photos/renditions/"):
+    """Storage name derived from the bytes, so a URL never changes meaning."""
+    return f"{prefix}{hashlib.sha256(content).hexdigest()[:24]}.{extension}"
@@ -1,66 +1,524 @@
-from django.http import JsonResponse
+import asyncio
+import json
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from itertools import chain
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
-from django.views.decorators.http import require_http_methods
-from .models import Graduate, StageState
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_http_methods, require_POST
+from .models import (
+    ChangeSequence,
+    DashboardCounter,
+    EventKind,
+    EventSource,
+    Graduate,
+    GraduateEvent,
+    Session,
+    StageState,
+)
+from .exports import EXPORT_PRESETS, XLSX_AVAILABLE, csv_chunks, export_filename, export_rows, write_xlsx
+from .metrics import get_store
+from .pagination import keyset_page
 from .forms import SearchForm, CheckInForm, GownForm, StudentDetailForm
+from .stage import broadcaster, format_sse, photo_sizes, stage_channel, stage_etag
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce, TruncMinute
 from django.contrib import messages
 
 
-# --------- GRAD ADMIN DASHBOARD --------- #
+# --------- CEREMONY SESSION --------- #
 
 @login_required
-def grad_admin(request):
-    stats = Graduate.objects.aggregate(
-        total=Count("id"),
-        checked_in=Count("id", filter=Q(attended=True)),
-        gown_collected=Count("id", filter=Q(gown_collected=True)),
-        gown_returned=Count("id", filter=Q(gown_returned=True)),
-        total_gown_to_return=Count("id", filter=Q(gown_option__icontains="hire")),
+@require_POST
+def select_session(request):
+    """Switch the session this user's desks, dashboard and stage work in."""
+    pk = request.POST.get('session', '')
+    if not (pk.isascii() and pk.isdigit()):
+        raise Http404('Unknown session')
+    session = get_object_or_404(Session, pk=pk, archived=False)
+    request.session[Session.REQUEST_KEY] = session.pk
+    messages.info(request, f"Now working in {session}.")
+
+    next_url = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = reverse('grad_admin')
+    return redirect(next_url)
+
+
+# --------- GRAD ADMIN DASHBOARD --------- #
+
+# ?sort= → ordering; each ends in unique_id so keyset cursors are unambiguous.
+# Descending sorts reverse every column, so one index serves both directions.
+GRAD_ADMIN_SORTS = {
+    'unique_id': ('unique_id',),
+    '-unique_id': ('-unique_id',),
+    'name': ('search_name', 'unique_id'),
+    '-name': ('-search_name', '-unique_id'),
+    'attended': ('attended', 'unique_id'),
+    '-attended': ('-attended', '-unique_id'),
+    'gown_collected': ('gown_collected', 'unique_id'),
+    '-gown_collected': ('-gown_collected', '-unique_id'),
+}
+GRAD_ADMIN_FILTERS = {
+    'not_checked_in': lambda qs: qs.filter(attended=False),
+    'hire_outstanding': lambda qs: qs.hire_outstanding(),
+}
+GRAD_ADMIN_PAGE_SIZE = 50
+
+
+def grad_admin_page(request):
+    """The requested slice of the student table, plus the query it came from."""
+    sort = request.GET.get('sort')
+    if sort not in GRAD_ADMIN_SORTS:
+        sort = 'unique_id'
+    filter_name = request.GET.get('filter')
+    if filter_name not in GRAD_ADMIN_FILTERS:
+        filter_name = ''
+
+    # 'session' too: rows from a related manager read it to attach the session
+    graduates = Session.for_request(request).graduates.only(
+        'session', 'display_name', 'name', 'email', 'student_id', 'qualification', 'unique_id',
+        'attended', 'gown_collected', 'search_name', 'photo', 'photo_status', 'photo_renditions',
     )
+    if filter_name:
+        graduates = GRAD_ADMIN_FILTERS[filter_name](graduates)
 
-    total = stats["total"]
-    checked_in = stats["checked_in"]
-    gown_collected = stats["gown_collected"]
-    gown_returned = stats["gown_returned"]
-    total_gown_to_return = stats["total_gown_to_return"]
+    graduates, next_cursor = keyset_page(
+        graduates, GRAD_ADMIN_SORTS[sort], request.GET.get('cursor'), GRAD_ADMIN_PAGE_SIZE
+    )
+    return graduates, next_cursor, sort, filter_name
 
-    graduates = Graduate.objects.all().order_by('unique_id')
-    # sorting the table
-    sort = request.GET.get("sort", "name")
-    if sort in ["attended", "-attended", "gown_collected", "-gown_collected", "unique_id", "-unique_id"]:
-        graduates = graduates.order_by(sort)
+
+@login_required
+def grad_admin(request):
+    # Maintained counters instead of aggregating over every graduate
+    stats = DashboardCounter.summary(Session.for_request(request).pk)
+    graduates, next_cursor, sort, filter_name = grad_admin_page(request)
 
     context = {
-        'total': total,
-        'checked_in': checked_in,
-        'gown_collected': gown_collected,
-        'gown_returned': gown_returned,
-        'total_gown_to_return': total_gown_to_return,
+        'stats': stats,
+        'exports': {name: title for name, (title, _, _) in EXPORT_PRESETS.items()},
+        'xlsx_available': XLSX_AVAILABLE,
         'graduates': graduates,
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'filter': filter_name,
     }
     return render(request, 'ceremony/grad_admin.html', context)
 
+
+@login_required
+def students_api(request):
+    """grad_admin table rows as JSON, one keyset page at a time (infinite scroll)."""
+    graduates, next_cursor, sort, filter_name = grad_admin_page(request)
+    results = [
+        {
+            'id': g.id,
+            'url': reverse('student_detail', args=[g.pk]),
+            'display_name': g.display_name,
+            'email': g.email,
+            'thumbnail_url': g.thumbnail_url,
+            'student_id': g.student_id,
+            'qualification': g.qualification,
+            'unique_id': g.unique_id,
+            'attended': g.attended,
+            'gown_collected': g.gown_collected,
+        }
+        for g in graduates
+    ]
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
+
+
+@login_required
+def stats_api(request):
+    """Dashboard tiles as JSON, cheap enough to poll from every open dashboard."""
+    return JsonResponse(DashboardCounter.summary(Session.for_request(request).pk))
+
+
+# Minutes of event log the throughput figures look back over: default and cap
+THROUGHPUT_WINDOW = 15
+THROUGHPUT_MAX_WINDOW = 24 * 60
+
+
+def queue_estimate(remaining, done, window):
+    """How long `remaining` will take at the pace of `done` per `window` minutes."""
+    rate = max(done, 0) / window
+    return {
+        'remaining': remaining,
+        'per_minute': round(rate, 2),
+        'eta_minutes': round(remaining / rate, 1) if rate else None,
+    }
+
+
+@login_required
+def throughput_api(request):
+    """
+    Desk and stage pace over the last ?minutes=, from the event log only:
+    events per minute for each desk and staff member, a per-minute
+    timeline, and how long the check-in line and the stage running orders
+    (all channels together, and each channel) will take at that pace.
+    """
+    try:
+        window = min(max(int(request.GET.get('minutes', THROUGHPUT_WINDOW)), 1), THROUGHPUT_MAX_WINDOW)
+    except ValueError:
+        window = THROUGHPUT_WINDOW
+    session = Session.for_request(request)
+    events = GraduateEvent.objects.filter(session=session, time__gte=timezone.now() - timedelta(minutes=window))
+
+    desks = list(
+        events.values('source', 'actor', 'kind').annotate(count=Count('id')).order_by('source', 'actor', 'kind')
+    )
+    totals = Counter()
+    for desk in desks:
+        desk['per_minute'] = round(desk['count'] / window, 2)
+        totals[desk['kind']] += desk['count']
+
+    timeline = events.annotate(minute=TruncMinute('time')).values('minute', 'kind').annotate(
+        count=Count('id')
+    ).order_by('minute', 'kind')
+
+    stats = DashboardCounter.summary(session.pk)
+    waiting = Counter(dict(
+        session.graduates.filter(stage_position__isnull=False)
+        .values_list('stage_channel').annotate(count=Count('id')).order_by()
+    ))
+    # Those already shown: up to whoever is on each channel's screen
+    # (unless they have since been moved to another channel)
+    for channel, on_screen_channel, position in session.stage_channels.values_list(
+        'channel', 'current_graduate__stage_channel', 'current_graduate__stage_position'
+    ):
+        if on_screen_channel == channel and position is not None:
+            shown_so_far = session.graduates.filter(stage_channel=channel, stage_position__lte=position).count()
+            waiting[channel] = max(waiting[channel] - shown_so_far, 0)
+    shown = Counter(dict(
+        events.filter(kind=EventKind.STAGE_SHOWN)
+        .values_list('channel').annotate(count=Count('id')).order_by()
+    ))
+
+    return JsonResponse({
+        'minutes': window,
+        'desks': desks,
+        'timeline': list(timeline),
+        'queues': {
+            'check_in': queue_estimate(
+                stats['total'] - stats['checked_in'],
+                totals[EventKind.CHECK_IN] - totals[EventKind.UNDO_CHECK_IN],
+                window,
+            ),
+            'stage': queue_estimate(sum(waiting.values()), totals[EventKind.STAGE_SHOWN], window),
+            'stage_channels': {
+                channel: queue_estimate(waiting[channel], shown[channel], window)
+                for channel in sorted((waiting.keys() | shown.keys()) - {None, ''})
+            },
+        },
+    })
+
+
+# Recent desk/stage events listed on the student page
+STUDENT_HISTORY = 20
+
+
 @login_required
 @require_http_methods(['GET', 'POST'])
 def student_detail(request, pk):
-    graduate = get_object_or_404(Graduate, pk=pk)
+    graduate = get_object_or_404(Session.for_request(request).graduates, pk=pk)
 
     if request.method == 'POST':
         form = StudentDetailForm(request.POST, request.FILES, instance=graduate)
         if form.is_valid():
-            form.save()
+            save_desk_form(request, form, source=EventSource.ADMIN)
             return redirect('grad_admin')
     else:
         form = StudentDetailForm(instance=graduate)
 
+    # Latest first (GraduateEvent.Meta.ordering), via the (graduate, time) index
+    history = graduate.events.all()[:STUDENT_HISTORY]
+
     return render(
         request,
         'ceremony/student_detail.html',
-        {'graduate': graduate, 'form': form},
+        {'graduate': graduate, 'form': form, 'history': history},
+    )
+
+
+# --------- EXPORTS (see ceremony.exports) --------- #
+
+async def aiterate(iterator):
+    """A sync iterator as an async one, advanced in the request's sync thread."""
+    while (chunk := await sync_to_async(next)(iterator, None)) is not None:
+        yield chunk
+
+
+@login_required
+def export(request, preset):
+    """
+    Download a preset list (see EXPORT_PRESETS) as CSV, streamed as it is
+    read, or with ?format=xlsx as an Excel workbook when openpyxl is installed.
+    """
+    if preset not in EXPORT_PRESETS:
+        raise Http404('Unknown export')
+    session = Session.for_request(request)
+
+    if request.GET.get('format') == 'xlsx':
+        if not XLSX_AVAILABLE:
+            raise Http404('XLSX export needs openpyxl')
+        file = tempfile.TemporaryFile()
+        write_xlsx(preset, session, file)
+        file.seek(0)
+        return FileResponse(file, as_attachment=True, filename=export_filename(preset, session, 'xlsx'))
+
+    # The byte order mark makes Excel read names as UTF-8
+    chunks = chain(['\ufeff'], csv_chunks(export_rows(preset, session)))
+    # Django reads a sync iterator to the end before sending it under ASGI
+    content = aiterate(chunks) if isinstance(request, ASGIRequest) else chunks
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(preset, session, "csv")}"'
+    return response
+
+
+# --------- DESK SEARCH (shared by check-in and gown desks) --------- #
+
+# Typeahead results per request: default and hard cap
+SEARCH_API_LIMIT = 20
+SEARCH_API_MAX_LIMIT = 50
+
+
+@login_required
+def search_api(request):
+    """Typeahead for the desk search boxes, backed by indexed prefix columns."""
+    try:
+        limit = min(int(request.GET.get('limit', SEARCH_API_LIMIT)), SEARCH_API_MAX_LIMIT)
+    except ValueError:
+        limit = SEARCH_API_LIMIT
+
+    graduates = Session.for_request(request).graduates.search(request.GET.get('q', '')).values(
+        'id', 'display_name', 'student_id', 'email', 'attended', 'gown_collected',
+    )[:max(limit, 1)]
+
+    return JsonResponse({'results': list(graduates)})
+
+
+# --------- DESK ACTIONS (shared by check-in and gown desks) --------- #
+
+# Flags that only ever change through Graduate.transition()
+DESK_FLAGS = ('attended', 'gown_collected', 'gown_returned')
+
+# Action → Graduate method, and the desk it is logged against (see GraduateEvent)
+DESK_ACTIONS = {
+    'check-in': ('check_in', EventSource.CHECK_IN_DESK),
+    'undo-check-in': ('undo_check_in', EventSource.CHECK_IN_DESK),
+    'collect-gown': ('collect_gown', EventSource.GOWN_DESK),
+    'return-gown': ('return_gown', EventSource.GOWN_DESK),
+}
+
+DESK_SYNC_MAX_ACTIONS = 200
+
+
+def desk_state(graduate):
+    """What a desk needs to show after an action, from Graduate.DESK_FIELDS."""
+    return {
+        'id': graduate.pk,
+        'display_name': graduate.display_name,
+        'student_id': graduate.student_id,
+        'unique_id': graduate.unique_id,
+        'attended': graduate.attended,
+        'check_in_time': graduate.check_in_time,
+        'checked_in_by': graduate.checked_in_by,
+        'gown_collected': graduate.gown_collected,
+        'gown_returned': graduate.gown_returned,
+        'stage_position': graduate.stage_position,
+    }
+
+
+def run_desk_action(request, graduate, action, initials='', when=None):
+    """Apply one DESK_ACTIONS entry; True if this call changed the graduate."""
+    method, source = DESK_ACTIONS[action]
+    actor = initials or request.user.get_username()
+    if action == 'check-in':
+        return graduate.check_in(initials, when, source, actor)
+    return getattr(graduate, method)(when, source, actor)
+
+
+def save_desk_form(request, form, staff_initials='', source=EventSource.OTHER):
+    """
+    Save a desk/admin ModelForm without clobbering another desk's work.
+    Only fields the user actually changed are written (update_fields), and
+    flags go through the conditional transitions, so e.g. the gown desk
+    collecting a gown while this form was open is kept. A flag that was
+    changed elsewhere in the meantime is reported instead of overwritten.
+    Flag changes are logged as made at the `source` desk.
+    """
+    graduate = form.save(commit=False)
+    actor = staff_initials or request.user.get_username()
+    changed = [name for name in form.changed_data if name in form.Meta.fields]
+    fields = [name for name in changed if name not in DESK_FLAGS]
+
+    applied = []
+    with transaction.atomic():
+        if fields:
+            graduate.save(update_fields=fields)
+
+        for name in DESK_FLAGS:
+            if name not in changed:
+                continue
+            value = form.cleaned_data[name]
+            if name == 'attended':
+                if value:
+                    done = graduate.check_in(staff_initials, source=source, actor=actor)
+                else:
+                    done = graduate.undo_check_in(source=source, actor=actor)
+            else:
+                done = graduate.transition({name: not value}, {name: value}, source, actor)
+            if done:
+                applied.append(name)
+
+    for name in DESK_FLAGS:
+        if name in changed and name not in applied:
+            messages.warning(
+                request, f"{form[name].label} was already changed at another desk – please check."
+            )
+    return graduate, applied
+
+
+@login_required
+@require_POST
+def desk_action(request, pk, action):
+    """
+    One desk action as a single conditional UPDATE, e.g. POST
+    /desk/42/collect-gown/. Answers with the graduate's state after the
+    request, and whether this request changed it.
+    """
+    if action not in DESK_ACTIONS:
+        return JsonResponse({'status': 'unknown_action', 'action': action}, status=404)
+
+    graduates = Session.for_request(request).graduates.only(*Graduate.DESK_FIELDS)
+    graduate = get_object_or_404(graduates, pk=pk)
+    initials = request.POST.get('staff_initials', '').strip()[:10]
+    done = run_desk_action(request, graduate, action, initials)
+
+    return JsonResponse({
+        'status': 'done' if done else 'unchanged',
+        'action': action,
+        'graduate': desk_state(graduate),
+    })
+
+
+@login_required
+@gzip_page
+def desk_roster(request):
+    """
+    Everything the desks need to search and act offline, as columns once
+    plus one short list per graduate. `seq` numbers the roster's state:
+    with ?since=<seq> only graduates changed after that are sent, and
+    "full" says whether the rows replace the desk's copy or update it.
+    Desks send back the `session` they hold; it is compared with the one
+    the user picked, so switching sessions resends the whole roster.
+    """
+    # Not for_request(): that would take the echoed ?session= as the answer
+    session = Session.picked(request)
+    roster = Graduate.ROSTER_SEQUENCE
+    # Read before the rows: anything changed later is sent again next time
+    seq = ChangeSequence.current(roster)
+    graduates = session.graduates.order_by('unique_id')
+
+    try:
+        since = int(request.GET['since'])
+    except (KeyError, ValueError):
+        since = None
+    full = (
+        since is None
+        or not 0 <= since <= seq
+        or since < ChangeSequence.current(f'{roster}:deleted')
+        or request.GET.get('session') != str(session.pk)
+    )
+    if not full:
+        graduates = graduates.filter(change_seq__gt=since)
+
+    rows = json.dumps(list(graduates.values_list(*Graduate.ROSTER_FIELDS)), separators=(',', ':'))
+    body = (
+        f'{{"session":{session.pk},"seq":{seq},"full":{json.dumps(full)},'
+        f'"fields":{json.dumps(Graduate.ROSTER_FIELDS)},"rows":{rows}}}'
     )
+    return HttpResponse(body, content_type='application/json', headers={'Cache-Control': 'private, no-cache'})
+
+
+def desk_item_pk(item):
+    """The graduate pk of a queued desk action, or None unless it is a plain, storable int."""
+    pk = item.get('graduate') if isinstance(item, dict) else None
+    if isinstance(pk, bool) or not isinstance(pk, int) or not 0 < pk < 2 ** 63:
+        return None
+    return pk
+
+
+def apply_desk_item(request, item, graduates):
+    """One queued action from desk_sync → its result."""
+    if not isinstance(item, dict):
+        return {'status': 'invalid'}
+    result = {'id': item.get('id')}
+    action = item.get('action')
+    pk = desk_item_pk(item)
+    if pk is None:
+        return {**result, 'status': 'invalid'}
+    graduate = graduates.get(pk)
+    if action not in DESK_ACTIONS:
+        return {**result, 'status': 'unknown_action'}
+    if graduate is None:
+        return {**result, 'status': 'not_found'}
+
+    # Queued while offline: keep the time of the scan, but never a future one
+    when = parse_datetime(str(item.get('at') or ''))
+    if when is not None and (timezone.is_naive(when) or when > timezone.now()):
+        when = None
+    initials = str(item.get('staff_initials') or '').strip()[:10]
+
+    done = run_desk_action(request, graduate, action, initials, when)
+    return {**result, 'status': 'done' if done else 'unchanged', 'graduate': desk_state(graduate)}
+
+
+@login_required
+@require_POST
+def desk_sync(request):
+    """
+    Apply a batch of actions queued by a desk (see static/ceremony/desk.js)
+    in one transaction: {"actions": [{"id", "graduate", "action",
+    "staff_initials", "at"}, ...]}. Each item gets its own result, in order;
+    "unchanged" means another desk got there first.
+    """
+    try:
+        actions = json.loads(request.body)['actions']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'status': 'invalid'}, status=400)
+    if not isinstance(actions, list) or len(actions) > DESK_SYNC_MAX_ACTIONS:
+        return JsonResponse({'status': 'invalid'}, status=400)
+
+    ids = {desk_item_pk(item) for item in actions} - {None}
+    # Not limited to the current session: actions queued offline may predate a switch
+    graduates = Graduate.objects.only(*Graduate.DESK_FIELDS).in_bulk(ids)
+    with transaction.atomic():
+        results = [apply_desk_item(request, item, graduates) for item in actions]
+    return JsonResponse({'results': results})
 
 
 # --------- 1) CHECK-IN / ATTENDANCE --------- #
@@ -68,38 +526,49 @@ def student_detail(request, pk):
 def check_in_search(request):
     form = SearchForm(request.GET or None)
     graduates = []
-    all_grads = Graduate.objects.all().order_by('name')
 
     if form.is_valid() and form.cleaned_data['query']:
-        q = form.cleaned_data['query'].strip()
-        graduates = Graduate.objects.filter(
-            Q(student_id__icontains=q)
-            | Q(name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(unique_id__icontains=q)
-            | Q(submission_id__icontains=q)
-        ).order_by('name')
-
-    context = {'form': form, 'graduates': graduates, 'all_grads': all_grads}
+        graduates = Session.for_request(request).graduates.search(form.cleaned_data['query'])
+
+    context = {'form': form, 'graduates': graduates}
     return render(request, 'ceremony/check_in_search.html', context)
 
 
+@login_required
+@require_POST
+def check_in_scan(request):
+    """
+    Barcode/QR fast path: exact ID match and check-in in one round-trip.
+    Scanning the same card twice just reports the earlier check-in.
+    """
+    code = request.POST.get('code', '').strip()
+    matches = list(Session.for_request(request).graduates.scanned(code)[:2]) if code else []
+
+    if not matches:
+        return JsonResponse({'status': 'not_found', 'code': code}, status=404)
+    if len(matches) > 1:
+        return JsonResponse({'status': 'ambiguous', 'code': code}, status=409)
+
+    graduate = matches[0]
+    checked_in = run_desk_action(request, graduate, 'check-in', request.POST.get('staff_initials', '').strip()[:10])
+
+    return JsonResponse({
+        'status': 'checked_in' if checked_in else 'already_checked_in',
+        'graduate': desk_state(graduate),
+    })
+
+
 @login_required
 @require_http_methods(['GET', 'POST'])
 def check_in_detail(request, pk):
-    graduate = get_object_or_404(Graduate, pk=pk)
+    graduate = get_object_or_404(Session.for_request(request).graduates, pk=pk)
 
     if request.method == 'POST':
         form = CheckInForm(request.POST, instance=graduate)
         if form.is_valid():
-            obj = form.save(commit=False)
             staff_initials = form.cleaned_data.get('staff_initials') or ''
-            if obj.attended and not obj.check_in_time:
-                obj.mark_attended(staff_initials)
-                action = 'Checked In'
-            else:
-                obj.save()
-                action = "Updated"
+            obj, applied = save_desk_form(request, form, staff_initials, EventSource.CHECK_IN_DESK)
+            action = 'Checked In' if 'attended' in applied and obj.attended else 'Updated'
             messages.success(request, f"{obj.display_name} has been {action} successfully.")
             return redirect('check_in_search')
     else:
@@ -117,31 +586,23 @@ def check_in_detail(request, pk):
 def gown_search(request):
     form = SearchForm(request.GET or None)
     graduates = []
-    all_grads = Graduate.objects.all().order_by('name')
 
     if form.is_valid() and form.cleaned_data['query']:
-        q = form.cleaned_data['query'].strip()
-        graduates = Graduate.objects.filter(
-            Q(student_id__icontains=q)
-            | Q(name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(unique_id__icontains=q)
-            | Q(submission_id__icontains=q)
-        ).order_by('name')
-
-    context = {'form': form, 'graduates': graduates, 'all_grads': all_grads}
+        graduates = Session.for_request(request).graduates.search(form.cleaned_data['query'])
+
+    context = {'form': form, 'graduates': graduates}
     return render(request, 'ceremony/gown_search.html', context)
 
 
 @login_required
 @require_http_methods(['GET', 'POST'])
 def gown_detail(request, pk):
-    graduate = get_object_or_404(Graduate, pk=pk)
+    graduate = get_object_or_404(Session.for_request(request).graduates, pk=pk)
 
     if request.method == 'POST':
         form = GownForm(request.POST, instance=graduate)
         if form.is_valid():
-            obj = form.save()
+            obj, applied = save_desk_form(request, form, source=EventSource.GOWN_DESK)
             messages.success(request, f"{obj.display_name}'s gown collection status is updated.")
             return redirect('gown_search')
     else:
@@ -155,93 +616,304 @@ def gown_detail(request, pk):
 
 
 # --------- 3) STAGE DISPLAY (CONTROL + SCREEN) --------- #
+# How many upcoming graduates the MC sees on the control panel
+STAGE_UP_NEXT = 5
+
+
 @login_required
 def stage_control(request):
-    """Back-stage control panel with NEXT button and reordering."""
-    state = StageState.get_solo()
+    """
+    Back-stage control panel with NEXT/PREV buttons and jumping, for one
+    stage channel (?channel=, created on first use) and its running order.
+    """
+    session = Session.for_request(request)
+    channel = stage_channel(request.GET.get('channel'))
+    state = StageState.objects.select_related('current_graduate').get_or_create(session=session, channel=channel)[0]
     current = state.current_graduate
-
-    def get_attended_queryset():
-        return Graduate.objects.filter(
-            attended=True,
-            gown_collected=True
-        ).order_by('unique_id')
-    attended_grads = list(get_attended_queryset())
+    # Moved to another channel since: NEXT starts this channel from its first
+    position = current.stage_position if current and current.stage_channel == channel else None
+    running_order = session.graduates.filter(stage_channel=channel, stage_position__isnull=False)
+    control_url = f"{reverse('stage_control')}?channel={channel}"
 
     if request.method == 'POST':
         # Reset screen display
         if 'reset' in request.POST:
             state.current_graduate = None
             state.save()
-            return redirect('stage_control')
+            return redirect(control_url)
+
+        # Hand a graduate over to another channel's running order
+        if 'move_channel' in request.POST:
+            graduate = running_order.filter(pk=request.POST.get('grad_id') or 0).first()
+            target_channel = stage_channel(request.POST.get('to_channel'))
+            if graduate and target_channel != channel:
+                graduate.stage_channel = target_channel
+                graduate.save(update_fields=['stage_channel'])
+                messages.success(request, f"{graduate.display_name} moved to {target_channel}.")
+            return redirect(control_url)
 
-        # Reorder up/down or jump/show from a specific student
-        grad_id = request.POST.get('grad_id')
         target = None
-        if grad_id:
-            try:
-                target = Graduate.objects.get(pk=grad_id)
-            except Graduate.DoesNotExist:
-                target = None
 
-        if target and target.attended and target.gown_collected:
-            # Show on screen / start from here (both behave the same)
-            if 'show' in request.POST or 'start_from_here' in request.POST:
-                state.current_graduate = target
-                state.save()
-                return redirect('stage_control')
-
-        # NEXT button
-        if 'next' in request.POST:
-            # Refresh after possible changes
-            attended = list(get_attended_queryset())
-            next_grad = None
-
-            if not attended:
-                next_grad = None
-            elif current and current in attended:
-                idx = attended.index(current)
-                if idx < len(attended) - 1:
-                    next_grad = attended[idx + 1]
-                else:
-                    next_grad = None  # already at last
-            else:
-                # No current, or current not in list → start from first
-                next_grad = attended[0]
+        # Show / start from a specific student (both behave the same)
+        grad_id = request.POST.get('grad_id')
+        if grad_id and ('show' in request.POST or 'start_from_here' in request.POST):
+            target = running_order.filter(pk=grad_id).first()
 
-            if next_grad:
-                state.current_graduate = next_grad
+        # Jump to a place (1, 2, …) in the running order
+        elif 'jump' in request.POST:
+            try:
+                place = int(request.POST.get('position', ''))
+            except ValueError:
+                place = 0
+            if place > 0:
+                target = running_order.order_by('stage_position')[place - 1:place].first()
+
+        # NEXT button – no current, or current left the queue → start from first
+        elif 'next' in request.POST:
+            target = running_order.filter(stage_position__gt=position or 0).order_by('stage_position').first()
+
+        # PREV button
+        elif 'prev' in request.POST and position:
+            target = running_order.filter(stage_position__lt=position).order_by('-stage_position').first()
+
+        if target:
+            with transaction.atomic():
+                state.current_graduate = target
                 state.save()
-                current = next_grad
-
-            return redirect('stage_control')
-        # For initial GET and after redirects
-    attended_grads = get_attended_queryset()
+                GraduateEvent.objects.create(
+                    session=session,
+                    graduate=target,
+                    kind=EventKind.STAGE_SHOWN,
+                    source=EventSource.STAGE,
+                    channel=channel,
+                    actor=request.user.get_username(),
+                )
+        return redirect(control_url)
+
+    up_next = running_order.filter(stage_position__gt=position or 0).order_by('stage_position')[:STAGE_UP_NEXT]
 
     context = {
         'current': current,
-        'attended_grads': attended_grads,
+        # Positions are spaced out (see Graduate.sync_stage_position): show places
+        'current_place': running_order.filter(stage_position__lte=position).count() if position else None,
+        'up_next': up_next,
+        'attended_grads': running_order.order_by('stage_position'),
+        'session': session,
+        'channel': channel,
+        'channels': list(session.stage_channels.values_list('channel', flat=True)),
     }
-    return render(request, 'ceremony/stage_control.html', context)        
+    return render(request, 'ceremony/stage_control.html', context)
 
 
-@login_required
-def stage_display(request):
-    """Big screen – read-only view that just shows current graduate."""
-    state = StageState.get_solo()
-    current = state.current_graduate
-    return render(request, 'ceremony/stage_display.html', {'current': current})
+# Graduates whose photos the big screen preloads: default and hard cap
+STAGE_PREFETCH = 3
+STAGE_PREFETCH_MAX = 10
 
 
-def current_student_api(request):
-    state = StageState.get_solo()
-    g = state.current_graduate
-    if g is None:
-        return JsonResponse({"id": None})
-        
+@login_required
+def stage_upcoming_api(request):
+    """
+    Prefetch manifest: the next graduates in a channel's running order
+    after the one on screen (or from the start), so the display can
+    download and decode their photos before NEXT is pressed.
+    """
+    try:
+        count = min(int(request.GET.get('count', STAGE_PREFETCH)), STAGE_PREFETCH_MAX)
+    except ValueError:
+        count = STAGE_PREFETCH
+    # Unknown sizes would fall back to the full-size upload
+    size = request.GET.get('size', 'stage')
+    if size not in photo_sizes():
+        size = 'stage'
+
+    session = Session.for_request(request)
+    channel = stage_channel(request.GET.get('channel'))
+    on_screen = session.graduates.filter(
+        stage_channel=channel, current_stage_state__session=session, current_stage_state__channel=channel
+    ).values('stage_position')[:1]
+    upcoming = session.graduates.filter(
+        stage_channel=channel,
+        stage_position__gt=Coalesce(Subquery(on_screen), 0),
+    ).order_by('stage_position')[:max(count, 0)]
+
     return JsonResponse({
-        "id": g.id,
-        "name": g.display_name,
-        "qualification": g.qualification,
-        "photo": g.photo.url if g.photo else None
+        'upcoming': [
+            {
+                'id': g.pk,
+                'name': g.display_name,
+                'qualification': g.qualification,
+                'photo': g.get_photo_url(size),
+            }
+            for g in upcoming
+        ],
     })
+
+
+@login_required
+def stage_display(request):
+    """Big screen – read-only view that just shows the current graduate of one ?channel=."""
+    session = Session.for_request(request)
+    channel = stage_channel(request.GET.get('channel'))
+    payload = StageState.get_payload(session.pk, channel)
+    current = payload if payload['id'] else None
+    return render(
+        request,
+        'ceremony/stage_display.html',
+        {'current': current, 'version': payload['version'], 'session': session, 'channel': channel},
+    )
+
+
+async def stage_display_channel(request):
+    """
+    (session id, channel) a display follows: ?session=<id> (one screen per
+    hall), else the user's session, and ?channel=, else the default one.
+    """
+    channel = stage_channel(request.GET.get('channel'))
+    session_id = request.GET.get('session', '')
+    if session_id.isdigit():
+        return int(session_id), channel
+    return (await sync_to_async(Session.for_request)(request)).pk, channel
+
+
+# Upper bound for ?wait= long-polls, and how often a waiting poll re-reads
+# the version (catches NEXT presses handled by another worker process)
+STAGE_LONG_POLL_MAX_WAIT = 30
+STAGE_LONG_POLL_RECHECK = 5
+
+
+async def wait_for_stage_change(session_id, channel, version, timeout):
+    """Block until the channel's stage version moves past `version` or `timeout` expires."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    with broadcaster.subscribe(session_id, channel) as queue:
+        while True:
+            current = await StageState.aget_version(session_id, channel)
+            remaining = deadline - loop.time()
+            if current != version or remaining <= 0:
+                return current
+            try:
+                payload = await asyncio.wait_for(
+                    queue.get(), min(remaining, STAGE_LONG_POLL_RECHECK)
+                )
+            except asyncio.TimeoutError:
+                continue
+            return payload['version']
+
+
+async def current_student_api(request):
+    """
+    Polling fallback for displays that cannot hold an event stream open.
+
+    Clients echo the ETag in If-None-Match and get a 304 while the stage is
+    unchanged; only the (cached) StageState version is read for that. With
+    ?wait=<seconds> the request is held open until the stage changes, and
+    ?size=thumb|desk|stage picks the photo rendition returned as "photo".
+    """
+    client_etag = request.headers.get('If-None-Match')
+    session_id, channel = await stage_display_channel(request)
+    version = await StageState.aget_version(session_id, channel)
+
+    try:
+        wait = min(float(request.GET.get('wait', 0)), STAGE_LONG_POLL_MAX_WAIT)
+    except ValueError:
+        wait = 0
+    if wait > 0 and client_etag == stage_etag(session_id, channel, version):
+        version = await wait_for_stage_change(session_id, channel, version, wait)
+
+    if client_etag == stage_etag(session_id, channel, version):
+        response = HttpResponseNotModified()
+    else:
+        payload = await StageState.aget_payload(session_id, channel)
+        version = payload['version']
+        size = request.GET.get('size')
+        if payload['id'] and size in payload['photos']:
+            payload = {**payload, 'photo': payload['photos'][size]}
+        response = JsonResponse(payload)
+
+    response['ETag'] = stage_etag(session_id, channel, version)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Seconds between SSE comments that keep proxies from closing idle streams
+STAGE_EVENTS_KEEPALIVE = 15
+
+
+async def stage_event_stream(session_id, channel):
+    loop = asyncio.get_running_loop()
+    with broadcaster.subscribe(session_id, channel) as queue:
+        # Subscribed first, so a change racing this read is still delivered
+        payload = await StageState.aget_payload(session_id, channel)
+        version = payload['version']
+        last_sent = loop.time()
+        yield format_sse(payload)
+
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), STAGE_LONG_POLL_RECHECK)
+            except asyncio.TimeoutError:
+                # Only this process publishes to `queue`: NEXT presses handled
+                # by another worker show up in the stored version instead
+                if await StageState.aget_version(session_id, channel) != version:
+                    payload = await StageState.aget_payload(session_id, channel)
+                elif loop.time() - last_sent >= STAGE_EVENTS_KEEPALIVE:
+                    last_sent = loop.time()
+                    yield ": keep-alive\n\n"
+                    continue
+                else:
+                    continue
+            if payload['version'] == version:
+                continue
+            version = payload['version']
+            last_sent = loop.time()
+            yield format_sse(payload)
+
+
+async def stage_events(request):
+    """
+    Server-Sent Events stream of stage changes.
+
+    Only served under ASGI; the WSGI dev server would buffer the endless
+    stream, so there we answer 204 and the display falls back to polling.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    session_id, channel = await stage_display_channel(request)
+    response = StreamingHttpResponse(stage_event_stream(session_id, channel), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# --------- OPS METRICS (opt-in, see ceremony.metrics) --------- #
+# Most recent flagged requests listed on the ops page
+OPS_FLAGGED = 25
+
+
+@staff_member_required
+def ops_metrics(request):
+    """Which views are slow right now, and why: latency, queries, templates."""
+    context = {'enabled': settings.METRICS_ENABLED}
+    if settings.METRICS_ENABLED:
+        store = get_store()
+        rows, flagged, sample_count = store.summary()
+        context.update({
+            'rows': rows,
+            'flagged': flagged[:OPS_FLAGGED],
+            'sample_count': sample_count,
+            'started': store.started,
+        })
+    return render(request, 'ceremony/ops_metrics.html', context)
+
+
+def prometheus_metrics(request):
+    """Prometheus scrape target; staff login or `Authorization: Bearer <METRICS_TOKEN>`."""
+    if not settings.METRICS_ENABLED:
+        raise Http404('Metrics are disabled')
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get('Authorization', '')
+    if not (request.user.is_staff or (token and constant_time_compare(bearer, f'Bearer {token}'))):
+        return HttpResponse(status=403)
+    return HttpResponse(get_store().prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,3 +3,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (needs the settings module set above)
+
+if settings.DEBUG:
+    # Mirror runserver: serve static files when running under an ASGI server
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
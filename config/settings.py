@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-replace-this-with-a-secret-key'
@@ -39,6 +42,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'ceremony.context_processors.ceremony_session',
             ],
         },
     },
@@ -47,13 +51,66 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
-DATABASES = {
+# Database, chosen by environment variable (see "Production database" in
+# the README). SQLite suits a single machine; use PostgreSQL when several
+# desks write at once or more than one server process is running.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'gradpilot'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            # Keep connections open between requests instead of reconnecting each time
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL_SIZE'):
+        # psycopg's connection pool (pip install "psycopg[pool]"); replaces CONN_MAX_AGE
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 2,
+            'max_size': int(os.environ['DB_POOL_SIZE']),
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets stage/desk reads carry on during a write; NORMAL sync
+                # is durable across app crashes and much faster per commit
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                # Take the write lock when a transaction starts, and queue for up
+                # to 20 s, instead of failing with "database is locked"
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgres', not {DB_ENGINE!r}")
+
+# Local-memory cache is per process. When running several workers, point
+# this at a shared backend (Redis, Memcached or the database cache) so every
+# worker sees stage changes immediately.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gradpilot',
     }
 }
 
+# Seconds a worker trusts its cached stage version before re-reading the
+# database. Bounds staleness across processes with the local-memory cache.
+STAGE_CACHE_TIMEOUT = 2
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-au'
@@ -68,6 +125,28 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background threads that crop/resize uploaded photos. Set to 0 to leave
+# uploads pending for `python manage.py process_photos` instead.
+PHOTO_WORKERS = 2
+
+# Also produce WebP copies of every photo rendition (smaller downloads)
+PHOTO_WEBP = False
+
+# Opt-in request metrics (see "Ops metrics" in the README): per-view latency,
+# queries and template time on /ops/metrics/ and /ops/metrics/prometheus/
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+# Requests kept in memory (per process) for percentiles and flagged requests
+METRICS_BUFFER_SIZE = 2000
+# Flag a request when a query takes this long, or one statement runs this often
+METRICS_SLOW_QUERY_MS = 100
+METRICS_REPEATED_QUERY_THRESHOLD = 10
+# Lets a Prometheus scraper in without a login (Authorization: Bearer <token>)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'ceremony.metrics.MetricsMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'ceremony.metrics.TimedTemplates'
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'grad_admin'
 LOGOUT_REDIRECT_URL = 'login'
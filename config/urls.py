@@ -1,13 +1,29 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
 
 
+# Photo renditions are named by content hash, so they never change in place
+serve_immutable = cache_control(public=True, max_age=60 * 60 * 24 * 365, immutable=True)(serve)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('ceremony.urls')),
     path('accounts/login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+if settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>photos/renditions/.*)$',
+            serve_immutable,
+            {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
+
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)